@@ -0,0 +1 @@
+"""Flet calculator app and its expression engine."""
@@ -0,0 +1,64 @@
+"""The calculator's entry point: ``python -m calculator``.
+
+Without a port (``--port`` or ``FLET_SERVER_PORT``) the app opens as a
+desktop window; with one it is served on the web together with
+``/api/eval`` and ``/metrics`` (see ``api``). ``--app`` picks another
+app: ``buffer``, ``matrix`` and ``stats`` are other calculators, and
+``calc1`` to ``calc5`` are the steps the keypad app was built in.
+``--workers`` serves it from several processes (see ``cluster``).
+
+Flet, and everything else the UI needs, is only imported once the app
+starts, so ``import calculator`` and its engine modules stay light.
+"""
+
+import argparse
+import importlib
+import os
+
+APPS = {
+    "keypad": "calculator.app",
+    "buffer": "calculator.buffer_app",
+    "matrix": "calculator.matrix_app",
+    "stats": "calculator.stats_app",
+    "calc1": "calculator.calc1",
+    "calc2": "calculator.calc2",
+    "calc3": "calculator.calc3",
+    "calc4": "calculator.calc4",
+    "calc5": "calculator.calc5",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m calculator", description="Flet calculator")
+    parser.add_argument("--app", choices=APPS, default="keypad", help="which app (default: keypad)")
+    parser.add_argument("--port", type=int, help="serve on this port (default: FLET_SERVER_PORT)")
+    parser.add_argument("--host", help="serve on this address (default: FLET_SERVER_IP or 0.0.0.0)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("CALC_WORKERS") or 1),
+        help="server processes, 0 for one per CPU (default: CALC_WORKERS or 1)",
+    )
+    # used by cluster to start its workers
+    parser.add_argument("--uds", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    port = args.port or os.getenv("FLET_SERVER_PORT")
+    workers = args.workers or os.cpu_count() or 1
+    if port and workers > 1 and not args.uds:
+        from . import cluster
+
+        host = args.host or os.getenv("FLET_SERVER_IP") or "0.0.0.0"
+        cluster.serve(args.app, workers, int(port), host)
+        return
+    app = importlib.import_module(APPS[args.app])
+    from .api import serve
+
+    serve(app.main, args.port, args.host, args.uds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Batch evaluation over HTTP, served next to the Flet app.
+
+``POST /api/eval`` takes a JSON array of expressions, or an NDJSON stream
+with one per line (``Content-Type: application/x-ndjson``). An item is
+either a string or an object such as
+``{"expr": "x^2", "x": 3, "mode": "decimal", "precision": 40}``.
+The response is NDJSON, streamed in order as results are ready:
+
+    {"index": 0, "result": "0.3"}
+    {"index": 1, "result": "Error"}
+    {"index": 2, "error": "time budget exceeded"}
+
+"result" is what the calculator would display. "error" means the item was
+not evaluated, and a request-level error ends the stream.
+
+Each request is limited to ``MAX_BATCH`` items and ``MAX_BODY_BYTES``
+bytes, and has a time budget (``?budget=`` seconds, at most
+``MAX_BUDGET``). Expressions go through the shared expression cache like
+the app's, and large ``!`` and ``^``, in every mode, go through the shared
+worker pool with the remaining budget as their timeout, so that no item
+holds the event loop the Flet sessions share. No Flet page is created.
+
+``GET /metrics`` serves the counters and histograms of ``metrics`` in the
+Prometheus text format, with the expression cache's and the worker pool's
+numbers read at scrape time.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+from . import engine, metrics, precision
+from .cache import shared_cache
+from .worker import EvaluationCancelled, EvaluationTimeout, needs_worker, shared_pool
+
+MAX_BATCH = 1000
+MAX_BODY_BYTES = 1 << 20
+MAX_EXPRESSION_LENGTH = 1000
+MAX_PRECISION = 100
+DEFAULT_BUDGET = 5.0
+MAX_BUDGET = 30.0
+# on SIGINT, requests still being served get this long to finish, within
+# fly.toml's kill_timeout
+DRAIN_TIMEOUT = 4.0
+# cheap items are evaluated on the event loop, which the Flet sessions
+# share; give it back this often
+_YIELD_EVERY = 32
+
+
+class RequestError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_item(item):
+    if isinstance(item, str):
+        return item, None, "float", precision.DEFAULT_PRECISION
+    if not isinstance(item, dict) or not isinstance(item.get("expr"), str):
+        raise RequestError('an item must be a string or an object with "expr"')
+    x = item.get("x")
+    if x is not None and (isinstance(x, bool) or not isinstance(x, (int, float))):
+        raise RequestError('"x" must be a number')
+    mode = item.get("mode", "float")
+    if mode not in precision.MODES:
+        raise RequestError(f'"mode" must be one of {", ".join(precision.MODES)}')
+    digits = item.get("precision", precision.DEFAULT_PRECISION)
+    if isinstance(digits, bool) or not isinstance(digits, int) or not 1 <= digits <= MAX_PRECISION:
+        raise RequestError(f'"precision" must be an integer from 1 to {MAX_PRECISION}')
+    return item["expr"], x, mode, digits
+
+
+async def _evaluate(item, deadline, cancel):
+    text, x, mode, digits = _parse_item(item)
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        return {"error": "expression too long"}
+    if mode != "float":
+        return await _evaluate_exact(text, x, mode, digits, deadline, cancel)
+    entry = shared_cache.get(text)
+    if not entry.expensive or entry.display is not None:
+        return {"result": shared_cache.calculate(text, x)}
+    # a worker process does the work, a thread waits for it
+    result = await asyncio.to_thread(
+        shared_cache.calculate, text, x, cancel, deadline - time.monotonic()
+    )
+    if result == "Error" and time.monotonic() >= deadline:
+        # the worker was stopped, as opposed to a genuine error
+        return {"error": "time budget exceeded"}
+    return {"result": result}
+
+
+async def _evaluate_exact(text, x, mode, digits, deadline, cancel):
+    # decimal and fraction items; large ! and ^ as in float mode
+    try:
+        node = precision.parse(text, mode)
+    except engine.CalcError:
+        return {"result": "Error"}
+    if not needs_worker(node):
+        return {"result": precision.calculate(text, mode, digits, x)}
+    try:
+        result = await asyncio.to_thread(
+            shared_pool.evaluate, node, x, cancel, deadline - time.monotonic(), mode, digits
+        )
+    except EvaluationTimeout:
+        return {"error": "time budget exceeded"}
+    except EvaluationCancelled:
+        raise
+    except engine.CalcError:
+        result = "Error"
+    return {"result": result}
+
+
+async def _read_json(request):
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_BODY_BYTES:
+            raise RequestError("request body too large", 413)
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise RequestError("invalid JSON") from None
+    if not isinstance(items, list):
+        raise RequestError("expected a JSON array")
+    if len(items) > MAX_BATCH:
+        raise RequestError(f"more than {MAX_BATCH} expressions", 413)
+    return items
+
+
+async def _json_items(items):
+    for item in items:
+        yield item
+
+
+async def _ndjson_items(request, on_end):
+    # items are evaluated while the rest of the body is still arriving
+    buffer = b""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_BODY_BYTES:
+            raise RequestError("request body too large", 413)
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _ndjson_line(line)
+    on_end()
+    if buffer.strip():
+        yield _ndjson_line(buffer)
+
+
+def _ndjson_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise RequestError("invalid JSON line") from None
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+
+async def _results(items, budget, cancel):
+    deadline = time.monotonic() + budget
+    index = 0
+    try:
+        async for item in items:
+            if cancel.is_set():
+                return
+            if index >= MAX_BATCH:
+                yield _line({"error": f"more than {MAX_BATCH} expressions"})
+                return
+            if time.monotonic() >= deadline:
+                record = {"error": "time budget exceeded"}
+            else:
+                try:
+                    record = await _evaluate(item, deadline, cancel)
+                except RequestError as e:
+                    record = {"error": str(e)}
+                except EvaluationCancelled:
+                    # the client went away while a worker had the item
+                    return
+                except Exception:
+                    # one item that breaks something must not end the batch
+                    record = {"error": "cannot evaluate this item"}
+            metrics.count("calc_api_expressions_total")
+            yield _line({"index": index, **record})
+            index += 1
+            if index % _YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+    except RequestError as e:
+        yield _line({"error": str(e)})
+
+
+async def _watch_disconnect(receive, cancel):
+    # only once the body is read, or this would take its chunks
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            # stops the batch and a running worker
+            cancel.set()
+            return
+
+
+def _budget(request):
+    value = request.query_params.get("budget")
+    if value is None:
+        return DEFAULT_BUDGET
+    try:
+        budget = float(value)
+    except ValueError:
+        raise RequestError("budget must be a number of seconds") from None
+    if not 0 < budget <= MAX_BUDGET:
+        raise RequestError(f"budget must be between 0 and {MAX_BUDGET} seconds")
+    return budget
+
+
+class EvalEndpoint:
+    # a plain ASGI app rather than a StreamingResponse, which reads from
+    # `receive` to watch for disconnects and so cannot stream the results
+    # of an NDJSON body that is still arriving
+    async def __call__(self, scope, receive, send):
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse
+
+        request = Request(scope, receive)
+        cancel = threading.Event()
+        watchers = []
+
+        def watch():
+            watchers.append(asyncio.ensure_future(_watch_disconnect(receive, cancel)))
+
+        try:
+            if request.method != "POST":
+                raise RequestError("use POST", 405)
+            budget = _budget(request)
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > MAX_BODY_BYTES:
+                raise RequestError("request body too large", 413)
+            content_type = request.headers.get("content-type", "")
+            if "ndjson" in content_type or "jsonl" in content_type:
+                # problems further down the stream end it with an error line
+                items = _ndjson_items(request, watch)
+            else:
+                items = _json_items(await _read_json(request))
+                watch()
+        except RequestError as e:
+            response = JSONResponse({"error": str(e)}, status_code=e.status)
+            await response(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson")],
+        })
+        try:
+            async for line in _results(items, budget, cancel):
+                await send({"type": "http.response.body", "body": line, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            # the client went away
+            pass
+        finally:
+            cancel.set()
+            for watcher in watchers:
+                watcher.cancel()
+
+
+def _process_metrics():
+    stats = shared_cache.stats()
+    return [
+        ("calc_cache_entries", "gauge", stats["size"]),
+        ("calc_cache_hits_total", "counter", stats["hits"]),
+        ("calc_cache_misses_total", "counter", stats["misses"]),
+        ("calc_cache_evictions_total", "counter", stats["evictions"]),
+        ("calc_workers_killed_total", "counter", shared_pool.killed),
+    ]
+
+
+metrics.collect(_process_metrics)
+
+
+async def metrics_endpoint(request):
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(session_handler):
+    # the Flet web app with /api/eval in front of it
+    import flet.fastapi
+    from starlette.routing import Route
+
+    app = flet.fastapi.FastAPI()
+    app.router.routes.append(Route("/api/eval", EvalEndpoint()))
+    app.router.routes.append(Route("/metrics", metrics_endpoint))
+    app.mount("/", flet.fastapi.app(session_handler))
+    return app
+
+
+def serve(session_handler, port=None, host=None, uds=None):
+    # FLET_SERVER_PORT is set where the app is deployed (Dockerfile,
+    # fly.toml); without a port the app runs as a desktop window, without
+    # the API. uds is a Unix socket to serve on instead, for cluster
+    port = port or os.getenv("FLET_SERVER_PORT")
+    if not port and not uds:
+        import flet as ft
+
+        ft.app(target=session_handler)
+        return
+    import uvicorn
+
+    host = host or os.getenv("FLET_SERVER_IP") or "0.0.0.0"
+    # permessage-deflate keeps a zlib compressor and decompressor per
+    # session, the largest per-session cost, to shrink messages that are
+    # a few hundred bytes of JSON. On SIGINT uvicorn stops accepting,
+    # closes the sessions (1012) and waits for the requests in progress
+    uvicorn.run(
+        create_app(session_handler),
+        host=host,
+        port=int(port or 0),
+        uds=uds,
+        ws_per_message_deflate=False,
+        timeout_graceful_shutdown=DRAIN_TIMEOUT,
+    )
@@ -0,0 +1,523 @@
+"""The keypad calculator, the app that is served.
+
+The numbers and operators typed make up an expression that "=" evaluates
+as a whole, with the usual precedence and parentheses; ``√``, ``sin``,
+``!`` and the other function keys act at once on the number on the
+display. Expressions are evaluated by ``engine`` (or ``precision`` in the
+decimal and fraction modes), and large ``!`` and ``^`` in the worker
+pool. Every "=" goes on the session's history tape (see ``history``),
+which the tape key shows; tapping a line there recalls its result. Start
+it with ``python -m calculator``.
+"""
+
+import asyncio
+import functools
+import re
+import threading
+
+import flet as ft
+
+from . import engine, history, keylog, metrics, precision
+from .worker import EvaluationCancelled, needs_worker, shared_pool
+
+# (background, text color) of each kind of key, shared by every session
+KEY_COLORS = {
+    "digit": (ft.colors.WHITE24, ft.colors.WHITE),
+    "action": (ft.colors.ORANGE, ft.colors.WHITE),
+    "extra": (ft.colors.BLUE_GREY_100, ft.colors.BLACK),
+}
+
+
+class CalcButton(ft.ElevatedButton):
+    # no per-instance attributes beyond Flet's own
+    __slots__ = ()
+    kind = None
+
+    def __init__(self, text, button_clicked, expand=1):
+        super().__init__()
+        self.text = text
+        self.expand = expand
+        self.on_click = button_clicked
+        self.data = text
+        if self.kind is not None:
+            self.bgcolor, self.color = KEY_COLORS[self.kind]
+
+
+class DigitButton(CalcButton):
+    __slots__ = ()
+    kind = "digit"
+
+
+class ActionButton(CalcButton):
+    __slots__ = ()
+    kind = "action"
+
+
+class ExtraActionButton(CalcButton):
+    __slots__ = ()
+    kind = "extra"
+
+
+# the keypad row by row: (text, button class, expand)
+KEYPAD = (
+    (("AC", ExtraActionButton, 1), ("+/-", ExtraActionButton, 1),
+     ("%", ExtraActionButton, 1), ("/", ActionButton, 1)),
+    (("7", DigitButton, 1), ("8", DigitButton, 1), ("9", DigitButton, 1), ("*", ActionButton, 1)),
+    (("4", DigitButton, 1), ("5", DigitButton, 1), ("6", DigitButton, 1), ("-", ActionButton, 1)),
+    (("1", DigitButton, 1), ("2", DigitButton, 1), ("3", DigitButton, 1), ("+", ActionButton, 1)),
+    (("0", DigitButton, 2), (".", DigitButton, 1), ("=", ActionButton, 1)),
+    (("(", DigitButton, 1), (")", DigitButton, 1), ("√", ActionButton, 1), ("^", ActionButton, 1)),
+    (("!", ActionButton, 1), ("sin", ActionButton, 1), ("cos", ActionButton, 1), ("tan", ActionButton, 1)),
+    (("mode", ExtraActionButton, 1), ("tape", ExtraActionButton, 1)),
+)
+
+
+# keyboard keys as reported by the client, to keypad keys
+KEYBOARD_KEYS = {
+    **{key: key for key in "0123456789.+-*/^()%!="},
+    **{f"Numpad {digit}": digit for digit in "0123456789"},
+    ",": ".",
+    "X": "*",
+    "Numpad Decimal": ".",
+    "Numpad Add": "+",
+    "Numpad Subtract": "-",
+    "Numpad Multiply": "*",
+    "Numpad Divide": "/",
+    "Numpad Equal": "=",
+    "Enter": "=",
+    "Numpad Enter": "=",
+    "Escape": "AC",
+    "Delete": "AC",
+    "P": "π",
+    "R": "√",
+    "S": "sin",
+    "C": "cos",
+    "T": "tan",
+    "N": "+/-",
+    "M": "mode",
+    "H": "tape",
+}
+# clients that report the unshifted key, on a US layout
+SHIFTED_KEYS = {"1": "!", "5": "%", "6": "^", "8": "*", "9": "(", "0": ")", "=": "+"}
+# a recalled result is pressed as this and the result, so that keylogs
+# replay it
+RECALL = "recall:"
+# lines of the tape shown at once, newest first
+TAPE_LINES = 8
+# where a browser keeps the id of its tape
+TAPE_KEY = "calculator.tape"
+OPERATORS = ("+", "-", "*", "/", "^")
+_PLAIN_NUMBER_RE = re.compile(r"-?\d+(?:\.\d*)?")
+# a key is pressed at once, unless a burst was less than this many seconds
+# ago: then the keys of the rest of that frame are pressed together, with
+# a single display update
+KEY_FRAME = 1 / 60
+
+
+def keyboard_key(e):
+    if e.ctrl or e.alt or e.meta:
+        return None
+    if e.shift and e.key in SHIFTED_KEYS:
+        return SHIFTED_KEYS[e.key]
+    return KEYBOARD_KEYS.get(e.key)
+
+
+# what the mode button cycles through: (mode, significant digits, label)
+PRECISION_MODES = [
+    ("float", precision.DEFAULT_PRECISION, ""),
+    ("decimal", 12, "DEC 12"),
+    ("decimal", 28, "DEC 28"),
+    ("decimal", 50, "DEC 50"),
+    ("fraction", precision.DEFAULT_PRECISION, "FRAC"),
+]
+
+
+class CalculatorApp(ft.Container):
+    def __init__(self):
+        super().__init__()
+        self.reset()
+        self.mode_index = 0
+        self.mode, self.precision, label = PRECISION_MODES[0]
+        self.mode_label = ft.Text(value=label, color=ft.colors.WHITE54, size=12)
+
+        self.result = ft.Text(value="0", color=ft.colors.WHITE, size=30)
+        # all digits of a result shown in scientific notation, on tap
+        self.digits = ft.Text(color=ft.colors.WHITE, size=12, selectable=True, visible=False)
+        # the AST of a result shown in scientific notation, and the text of
+        # the expression it came from, which stands in for the display when
+        # the result is used again
+        self.expandable = None
+        self.expression = None
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        self.cancel_event = threading.Event()
+        self.busy = False
+        self.pending_keys = []
+        self.pressing_keys = False
+        # loop time at which the last burst was handed to a thread
+        self.burst_started = 0.0
+        self.history = history.HistoryTape(history.shared_store)
+        # its lines are only built while it is shown
+        self.tape = ft.Column(spacing=0, visible=False)
+        # None unless CALC_RECORD is set
+        self.keylog = keylog.open_log("keypad")
+        self.width = 350
+        self.bgcolor = ft.colors.BLACK
+        self.border_radius = ft.border_radius.all(20)
+        self.padding = 10
+        # one bound method for every key
+        clicked = self.button_clicked
+        self.content = ft.Column(
+            spacing=5,
+            controls=[
+                ft.Row(
+                    controls=[
+                        self.mode_label,
+                        self.progress,
+                        # a Container rather than a GestureDetector, which
+                        # carries a couple of dozen event handlers
+                        ft.Container(content=self.result, on_click=self.expand_result),
+                    ],
+                    alignment="end",
+                ),
+                self.digits,
+                self.tape,
+            ]
+            + [
+                ft.Row(
+                    spacing=5,
+                    controls=[cls(text, clicked, expand) for text, cls, expand in row],
+                )
+                for row in KEYPAD
+            ],
+        )
+
+    def reset(self):
+        self.new_operand = True
+        # whether the display was typed rather than calculated
+        self.typed = False
+        # the expression before the display: operands and operators
+        self.chain = []
+
+    async def button_clicked(self, e):
+        # clicks take their turn with typed keys rather than racing them on
+        # a thread of their own
+        self.queue_key(e.control.data)
+
+    async def key_pressed(self, e):
+        data = keyboard_key(e)
+        if data is not None:
+            self.queue_key(data)
+
+    def queue_key(self, data):
+        # on the event loop, so keys are queued in the order they came
+        if data == "AC":
+            # at once rather than after the keys ahead of it
+            self.cancel_event.set()
+        self.pending_keys.append(data)
+        if len(self.pending_keys) == 1 and not self.pressing_keys:
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        # on the event loop
+        loop = asyncio.get_running_loop()
+        wait = self.burst_started + KEY_FRAME - loop.time()
+        if wait > 0:
+            loop.call_later(wait, self.flush_keys)
+        else:
+            self.flush_keys()
+
+    def flush_keys(self):
+        # on the event loop; one burst at a time, the next waits for it
+        loop = asyncio.get_running_loop()
+        keys, self.pending_keys = self.pending_keys, []
+        self.pressing_keys = True
+        self.burst_started = loop.time()
+        self.page.run_thread(self.press_burst, keys, loop)
+
+    def press_burst(self, keys, loop):
+        try:
+            self.press_keys(keys)
+        finally:
+            loop.call_soon_threadsafe(self.burst_done)
+
+    def burst_done(self):
+        self.pressing_keys = False
+        if self.pending_keys:
+            self.schedule_flush()
+
+    def press_keys(self, keys):
+        cancel = self.cancel_event
+        changed = []
+        pressed = [data for data in keys if self.press_key(data, changed)]
+        self.update_display(*changed)
+        # keys ignored while busy, or whose calculation an AC cancelled,
+        # left nothing to replay
+        if self.keylog is not None and pressed and ("AC" in pressed or not cancel.is_set()):
+            self.keylog.record(pressed, self.result.value)
+
+    def press_key(self, data, changed):
+        # False when the key is ignored while a calculation runs
+        key = "recall" if data.startswith(RECALL) else data
+        metrics.count("calc_keys_total", "key", key)
+        metrics.event("key", key=key, mode=self.mode)
+        if data == "AC":
+            # stops a calculation still running for this session
+            self.cancel_event.set()
+            self.cancel_event = threading.Event()
+        if self.digits.visible and not self.busy:
+            self.digits.visible = False
+            self.digits.value = None
+            changed.append(self.digits)
+        if self.result.value == "Error" or data == "AC":
+            self.result.value = "0"
+            self.expandable = None
+            self.reset()
+            return True
+        if self.busy:
+            return False
+
+        try:
+            self.handle_button(data)
+        except EvaluationCancelled:
+            pass
+        except engine.CalcError:
+            metrics.count("calc_errors_total")
+            self.result.value = "Error"
+            self.reset()
+        if data == "mode":
+            changed.append(self.mode_label)
+        elif data == "tape" or (data == "=" and self.tape.visible):
+            if data == "=":
+                self.fill_tape(None)
+            changed.append(self.tape)
+        return True
+
+    def update_display(self, *controls):
+        # only the controls a key can change: self.update() would diff the
+        # whole keypad against its last snapshot on every click
+        started = metrics.start()
+        self.page.update(self.result, self.progress, *controls)
+        metrics.observe("calc_update_seconds", started)
+
+    def handle_button(self, data):
+        handler = self.KEY_HANDLERS.get(data)
+        if handler is None and data.startswith(RECALL):
+            handler = CalculatorApp.press_recall
+        if handler is not None:
+            handler(self, data)
+
+    def press_digit(self, data):
+        if self.result.value == "0" or self.new_operand == True:
+            self.result.value = data
+            self.expandable = None
+            self.new_operand = False
+            self.typed = True
+        else:
+            self.result.value = self.result.value + data
+
+    def operand(self):
+        # the display as part of the expression; a calculated "1/3" or
+        # "1.5e+300" is one operand whatever comes around it
+        if self.expandable is not None:
+            # "4.02387260077e+2567" is not the number, 1000! is
+            return f"({self.expression})"
+        value = self.result.value
+        if self.typed or _PLAIN_NUMBER_RE.fullmatch(value):
+            return value
+        return f"({value})"
+
+    def press_operator(self, data):
+        if self.chain and self.chain[-1] in OPERATORS and self.new_operand and not self.typed:
+            # another operator straight after one replaces it
+            self.chain[-1] = data
+            return
+        self.chain += [self.operand(), data]
+        self.new_operand = True
+        self.typed = False
+
+    def press_equals(self, data):
+        expression = "".join(self.chain) + self.operand()
+        self.result.value = self.evaluate_text(expression)
+        if self.chain:
+            self.history.add(expression, self.result.value)
+        self.reset()
+
+    def press_sign(self, data):
+        if self.expandable is not None:
+            self.expandable = ("neg", self.expandable)
+            self.expression = f"-({self.expression})"
+            value = self.result.value
+            self.result.value = value[1:] if value.startswith("-") else "-" + value
+            return
+        value = self.read_value()
+        if value > 0:
+            self.result.value = "-" + str(self.result.value)
+
+        elif value < 0:
+            self.result.value = precision.format_value(abs(value), self.precision)
+
+    def press_percent(self, data):
+        self.result.value = self.apply_function(data)
+        self.reset()
+
+    def press_function(self, data):
+        self.result.value = self.apply_function(data)
+        self.new_operand = True
+        self.typed = False
+
+    def press_mode(self, data):
+        self.next_mode()
+
+    def press_tape(self, data):
+        if self.tape.visible:
+            self.tape.visible = False
+            self.tape.controls = []
+            return
+        # a number being typed shows the calculations that start with it
+        self.fill_tape(None if self.new_operand else self.result.value)
+        self.tape.visible = True
+
+    def press_recall(self, data):
+        # a result from the tape, as if it had been calculated here
+        self.result.value = data[len(RECALL):]
+        self.expandable = None
+        self.new_operand = True
+        self.typed = False
+
+    def fill_tape(self, prefix):
+        if prefix:
+            entries = self.history.search(prefix, TAPE_LINES)
+        else:
+            entries = self.history.recent(TAPE_LINES)
+        self.tape.controls = [
+            ft.Container(
+                content=ft.Text(
+                    f"{expression} = {result}", color=ft.colors.WHITE54, size=12, no_wrap=True
+                ),
+                data=RECALL + result,
+                on_click=self.button_clicked,
+            )
+            for expression, result in entries
+        ] or [ft.Text("no calculations", color=ft.colors.WHITE38, size=12)]
+
+    # one dispatch table for the class instead of branches per key
+    KEY_HANDLERS = {
+        **dict.fromkeys(
+            ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", ".", "π", "(", ")"), press_digit
+        ),
+        **dict.fromkeys(OPERATORS, press_operator),
+        "=": press_equals,
+        "+/-": press_sign,
+        "%": press_percent,
+        **dict.fromkeys(("√", "sin", "cos", "tan", "!"), press_function),
+        "mode": press_mode,
+        "tape": press_tape,
+    }
+
+    def read_value(self):
+        # the display may hold more than a plain number, e.g. "2π" or "(3)"
+        return precision.evaluate_text(self.result.value, self.mode, self.precision)
+
+    def next_mode(self):
+        # a pending operation is dropped, its operand has the old number type
+        self.mode_index = (self.mode_index + 1) % len(PRECISION_MODES)
+        self.mode, self.precision, self.mode_label.value = PRECISION_MODES[self.mode_index]
+        self.reset()
+
+    def apply_function(self, name):
+        operand = self.operand()
+        if name in ("!", "%"):
+            return self.evaluate_text(f"({operand}){name}")
+        return self.evaluate_text(f"{name}({operand})")
+
+    def evaluate_text(self, text):
+        if self.mode == "float":
+            node = engine.parse(text)
+        else:
+            node = precision.parse(text, self.mode)
+        display = self.evaluate_node(node)
+        self.expression = text
+        return display
+
+    def evaluate_node(self, node):
+        self.expandable = None
+        started = metrics.start()
+        try:
+            return self.evaluate_display(node)
+        finally:
+            metrics.observe("calc_evaluate_seconds", started)
+
+    def evaluate_display(self, node):
+        if self.mode != "float":
+            if not needs_worker(node):
+                metrics.count("calc_evaluations_total", "path", self.mode)
+                return precision.format_value(
+                    precision.evaluate(node, self.mode, self.precision), self.precision
+                )
+            # Decimal and Fraction build the same large ints for ! and ^
+            metrics.count("calc_evaluations_total", "path", "worker")
+            return self.run_in_worker(
+                functools.partial(shared_pool.evaluate, mode=self.mode, digits=self.precision),
+                node,
+            )
+        if not needs_worker(node):
+            metrics.count("calc_evaluations_total", "path", "inline")
+            display = engine.format_number(engine.evaluate(node))
+        else:
+            metrics.count("calc_evaluations_total", "path", "worker")
+            display = self.run_in_worker(shared_pool.evaluate, node)
+        if "e+" in display:
+            # shortened, the digits are only built if the user taps it
+            self.expandable = node
+        return display
+
+    def run_in_worker(self, method, node):
+        # ! and ^ may take long: run them in a worker process and show the
+        # progress ring until the result is back, AC cancels
+        self.busy = True
+        self.progress.visible = True
+        if self.page is not None:
+            # not when replayed without a page, see keylog
+            self.progress.update()
+        try:
+            return method(node, cancel=self.cancel_event)
+        finally:
+            self.busy = False
+            self.progress.visible = False
+
+    def expand_result(self, e):
+        if self.expandable is None or self.busy:
+            return
+        try:
+            self.digits.value = self.run_in_worker(shared_pool.expand, self.expandable)
+            self.digits.visible = True
+        except EvaluationCancelled:
+            pass
+        except engine.CalcError:
+            self.digits.value = "Error"
+            self.digits.visible = True
+        # also hides the progress ring after AC
+        self.update_display(self.digits)
+
+
+def main(page: ft.Page):
+    page.title = "Calc App"
+    calc = CalculatorApp()
+    page.on_keyboard_event = calc.key_pressed
+
+    page.add(calc)
+    if history.shared_store is not None:
+        page.run_task(attach_tape, page, calc.history)
+
+
+async def attach_tape(page, tape):
+    # on the event loop, not to hold a thread while the client answers
+    try:
+        tape_id = await page.client_storage.get_async(TAPE_KEY)
+        if tape_id is None:
+            await page.client_storage.set_async(TAPE_KEY, tape.tape_id)
+        else:
+            tape.attach(tape_id)
+    except Exception:
+        # a client that does not answer keeps the session's own tape
+        pass
@@ -0,0 +1,55 @@
+"""Cost per "=" press with and without the shared expression cache.
+
+Each simulated session is a thread that evaluates expressions drawn from a
+common pool, the way many users of the web app type the same things. With
+the cache the time per request should stay flat as sessions are added.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_cache
+"""
+
+import random
+import threading
+import time
+
+from calculator import engine
+from calculator.cache import ExpressionCache
+
+POOL = [f"{a}+{b}*{c}" for a in range(10) for b in range(10) for c in range(5)] + [
+    "2π(3.5+4.25)^2/(1+2+3+4+5+6+7+8+9)",
+    "√(3^2+4^2)",
+    "sin30+cos60",
+    "10!/(3!7!)",
+]
+REQUESTS_PER_SESSION = 2000
+
+
+def run_sessions(sessions, calculate):
+    def session(seed):
+        rng = random.Random(seed)
+        for _ in range(REQUESTS_PER_SESSION):
+            calculate(rng.choice(POOL))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (time.perf_counter() - start) / (sessions * REQUESTS_PER_SESSION)
+
+
+def main():
+    for sessions in (1, 10, 50):
+        uncached = run_sessions(sessions, engine.calculate)
+        cache = ExpressionCache(maxsize=1024)
+        cached = run_sessions(sessions, cache.calculate)
+        print(
+            f"{sessions:>3} sessions: uncached {uncached * 1e6:6.2f} us/request, "
+            f"cached {cached * 1e6:6.2f} us/request  {cache.stats()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
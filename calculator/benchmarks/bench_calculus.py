@@ -0,0 +1,72 @@
+"""Time of ∫ and Σ, against adding the terms up in a Python loop.
+
+Times a few integrals and sums with ``calculus`` (through ``engine``, as
+the app evaluates them), best of ``--repeat``. For the sums over a long
+range it also times a Python loop over the scalar engine for
+``LOOP_TERMS`` terms and scales that up to the whole range, which is what
+summing term by term would cost.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_calculus [--repeat N]
+"""
+
+import argparse
+import math
+import time
+
+from calculator import calculus, engine
+
+INTEGRALS = [
+    "∫(x^2, 0, 3)",
+    "∫(sin(x), 0, 180)",
+    "∫(1/√(x), 0, 1)",
+    "∫(x!, 0, 5)",
+]
+SUMS = [
+    "Σ(n^2, n, 1, 10^8)",
+    "Σ(n^3-2n+1, n, -5, 10^12)",
+    "Σ(1/n^2, n, 1, 10^8)",
+    "Σ((-1)^n/n, n, 1, 10^8)",
+    "Σ(sin(n)/n, n, 1, 10^7)",
+]
+LOOP_TERMS = 100_000
+
+
+def best(text, repeat):
+    node = engine.parse(text)
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = engine.evaluate(node)
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds, value
+
+
+def loop_seconds(text):
+    # per term, times the terms of the range
+    _, body, lo, hi = engine.parse(text)
+    lo = engine.evaluate(lo)
+    count = engine.evaluate(hi) - lo + 1
+    started = time.perf_counter()
+    math.fsum(engine.evaluate(body, n) for n in range(lo, lo + min(count, LOOP_TERMS)))
+    return (time.perf_counter() - started) / min(count, LOOP_TERMS) * count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # NumPy's import is not the integrals' cost
+    calculus.integrate(engine.parse("x"), 0, 1)
+    print(f"{'expression':<28} {'ms':>9} {'loop s':>9}  value")
+    for text in INTEGRALS + SUMS:
+        seconds, value = best(text, args.repeat)
+        loop = f"{loop_seconds(text):9.1f}" if text in SUMS else f"{'':9}"
+        print(f"{text:<28} {seconds * 1000:9.2f} {loop}  {engine.format_number(value)[:24]}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
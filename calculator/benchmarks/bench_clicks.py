@@ -0,0 +1,152 @@
+"""Bytes sent over the Flet websocket per click.
+
+Starts ``python -m calculator`` as a web server on a free local port,
+opens a session the way the browser client does, presses keys by sending
+the client's click events and records, for every click, the bytes of the
+messages the server sends back and the time until the first of them
+arrives (click to display). A click is over when the server has been quiet
+for ``QUIET`` seconds.
+
+Then types ``TYPED`` on the keyboard, once a key at a time and once as a
+burst (every key sent without waiting, as fast typing or a paste would),
+to compare the messages the server sends back for each.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_clicks [-v]
+
+``-v`` also prints the messages of every click.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import websockets
+
+from .bench_sessions import free_port, register_message, wait_for_server
+
+# keys pressed, by their text on the keypad
+SEQUENCE = [
+    "1", "2", "+", "3", "4", "*", "5", "=",
+    "AC", "2", "^", "1", "0", "=",
+    "9", "√", "+/-", "%",
+    "mode", "1", "/", "3", "=", "mode", "mode", "mode", "mode",
+    "1", "0", "0", "0", "!", "AC",
+]
+# keyboard keys, as the client reports them
+TYPED = ["1", "2", "+", "3", "4", "*", "5", "Enter", "Escape", "2", "^", "1", "0", "Enter"]
+QUIET = 0.3
+
+
+def key_ids(message):
+    # control id of every key, from the controls the app added
+    ids = {}
+    for command in message["payload"] if message["action"] == "pageControlsBatch" else [message]:
+        if command["action"] != "addPageControls":
+            continue
+        for control in command["payload"]["controls"]:
+            if control["t"] == "elevatedbutton":
+                ids[control["text"]] = control["i"]
+    return ids
+
+
+def click_message(control_id):
+    payload = {"eventTarget": control_id, "eventName": "click", "eventData": ""}
+    return json.dumps({"action": "pageEventFromWeb", "payload": payload})
+
+
+def keyboard_message(key):
+    data = {"key": key, "shift": False, "ctrl": False, "alt": False, "meta": False}
+    payload = {"eventTarget": "page", "eventName": "keyboard_event", "eventData": json.dumps(data)}
+    return json.dumps({"action": "pageEventFromWeb", "payload": payload})
+
+
+async def click(ws, control_id):
+    await ws.send(click_message(control_id))
+    return await replies(ws)
+
+
+async def replies(ws):
+    # the server's messages until it has been quiet for QUIET seconds
+    start = time.perf_counter()
+    latency = None
+    messages = []
+    while True:
+        try:
+            message = await asyncio.wait_for(ws.recv(), QUIET)
+        except asyncio.TimeoutError:
+            return latency, messages
+        if latency is None:
+            latency = time.perf_counter() - start
+        messages.append(message)
+
+
+async def measure(port, verbose):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws", max_size=None) as ws:
+        await ws.send(register_message())
+        while True:
+            message = json.loads(await ws.recv())
+            if message["action"] in ("pageControlsBatch", "addPageControls"):
+                break
+        ids = key_ids(message)
+        print(f"{'key':>6} {'bytes':>7} {'messages':>9} {'ms':>7}")
+        total = 0
+        latencies = []
+        for key in SEQUENCE:
+            latency, messages = await click(ws, ids[key])
+            size = sum(len(m.encode()) for m in messages)
+            total += size
+            if latency is not None:
+                latencies.append(latency)
+            ms = f"{latency * 1000:7.1f}" if latency is not None else f"{'-':>7}"
+            print(f"{key:>6} {size:7} {len(messages):9} {ms}")
+            if verbose:
+                for m in messages:
+                    print(f"         {m}")
+        latencies.sort()
+        print(f"{len(SEQUENCE)} clicks, {total / len(SEQUENCE):.0f} bytes per click")
+        if latencies:
+            print(f"median click to display {latencies[len(latencies) // 2] * 1000:.1f} ms")
+
+        print(f"typing {' '.join(TYPED)}")
+        sizes = []
+        count = 0
+        for key in TYPED:
+            await ws.send(keyboard_message(key))
+            latency, messages = await replies(ws)
+            sizes += [len(m.encode()) for m in messages]
+        print(f"  a key at a time: {len(sizes):3} messages {sum(sizes):6} bytes")
+        for key in TYPED:
+            await ws.send(keyboard_message(key))
+        latency, messages = await replies(ws)
+        size = sum(len(m.encode()) for m in messages)
+        print(f"  as a burst:      {len(messages):3} messages {size:6} bytes")
+        if verbose:
+            for m in messages:
+                print(f"         {m}")
+
+
+def main():
+    verbose = "-v" in sys.argv[1:]
+    port = free_port()
+    env = dict(os.environ, FLET_SERVER_PORT=str(port), FLET_SERVER_IP="127.0.0.1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "calculator"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port, process)
+        asyncio.run(measure(port, verbose))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
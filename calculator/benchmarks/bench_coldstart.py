@@ -0,0 +1,146 @@
+"""Image size and cold start of the container image.
+
+Builds the image from ``calculator/Dockerfile`` (unless ``--no-build``),
+reports its size, then starts a new container from it ``--runs`` times,
+the way fly.io starts a machine that was scaled to zero: nothing running,
+nothing cached in the container. For each start it measures, from
+``docker run``, the time until ``GET /`` answers (first response) and
+until a session opened the way the browser client does has the app's
+controls (first frame). The container is limited to ``CPUS`` and
+``MEMORY``, a shared-cpu-1x machine's.
+
+Needs docker. Run from the repository root:
+
+    python -m calculator.benchmarks.bench_coldstart [--tag TAG] [--no-build] [--runs N]
+
+To compare with another build, check it out and run this with another
+``--tag``.
+"""
+
+import argparse
+import asyncio
+import http.client
+import os
+import subprocess
+import time
+import urllib.request
+
+from .bench_sessions import free_port
+from .bench_startup import first_frame
+
+CONTEXT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CPUS = "1"
+MEMORY = "256m"
+
+
+class Container:
+    # what first_frame polls to see whether the server is still starting
+    def __init__(self, container_id):
+        self.container_id = container_id
+
+    def poll(self):
+        result = subprocess.run(
+            ["docker", "inspect", "-f", "{{.State.Running}}", self.container_id],
+            capture_output=True,
+            text=True,
+        )
+        return None if result.stdout.strip() == "true" else 1
+
+    def kill(self):
+        subprocess.run(["docker", "kill", self.container_id], capture_output=True)
+
+
+def build(tag):
+    started = time.perf_counter()
+    subprocess.run(
+        ["docker", "build", "-q", "-t", tag, CONTEXT], check=True, stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - started
+
+
+def image_size(tag):
+    result = subprocess.run(
+        ["docker", "image", "inspect", "-f", "{{.Size}}", tag],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return int(result.stdout)
+
+
+def first_response(port, started, timeout=60):
+    # no proxy: the server is local
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    while time.perf_counter() < started + timeout:
+        try:
+            with opener.open(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                response.read()
+                return time.perf_counter() - started
+        except (OSError, http.client.HTTPException):
+            # docker accepts the connection before the app listens
+            time.sleep(0.01)
+    raise RuntimeError("server did not start")
+
+
+def start(tag):
+    # a new container; the clock starts before docker run
+    port = free_port()
+    started = time.perf_counter()
+    result = subprocess.run(
+        [
+            "docker", "run", "-d", "--rm",
+            "--cpus", CPUS, "--memory", MEMORY,
+            "-p", f"127.0.0.1:{port}:8080",
+            tag,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return Container(result.stdout.strip()), port, started
+
+
+def cold_start(tag):
+    container, port, started = start(tag)
+    try:
+        response = first_response(port, started)
+    finally:
+        container.kill()
+    # the first frame in a second container, so that loading the page
+    # above has not warmed it up
+    container, port, started = start(tag)
+    try:
+        frame = asyncio.run(first_frame(port, container, started))
+    finally:
+        container.kill()
+    return response, frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tag", default="flet-calc:bench")
+    parser.add_argument("--no-build", action="store_true", help="use the image already tagged")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.no_build:
+        print(f"build {build(args.tag):.1f} s")
+    print(f"image {args.tag} {image_size(args.tag) / 2**20:.1f} MiB")
+    print(f"{'run':>4} {'first response ms':>18} {'first frame ms':>15}")
+    responses = []
+    frames = []
+    for run in range(1, args.runs + 1):
+        response, frame = cold_start(args.tag)
+        responses.append(response)
+        frames.append(frame)
+        print(f"{run:4} {response * 1000:18.0f} {frame * 1000:15.0f}", flush=True)
+    responses.sort()
+    frames.sort()
+    print(
+        f"median {responses[len(responses) // 2] * 1000:13.0f} "
+        f"{frames[len(frames) // 2] * 1000:15.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compiled expressions against the tree-walker and the old eval() path.
+
+The eval column is what CalculatorApp.calculate_result used to do: the
+string-buffer app substitutes the number for x and hands the buffer to
+eval() on every "=".
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_compiler
+"""
+
+import timeit
+
+from calculator import compiler, engine
+
+# (calculator syntax, the same formula as a Python expression for eval)
+EXPRESSIONS = [
+    ("x^3-2*x+1", "{x}**3-2*{x}+1"),
+    ("(x+1)*(x-1)/(x*x+2)", "({x}+1)*({x}-1)/({x}*{x}+2)"),
+    ("2x^2+3x-4+x/7", "2*{x}**2+3*{x}-4+{x}/7"),
+    ("√(x^2+1)*sin(x)", None),
+]
+
+
+def bench(label, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<22} {seconds * 1e6:8.3f} us")
+    return seconds
+
+
+def main():
+    number = 20000
+    x = 3.5
+    for text, python_text in EXPRESSIONS:
+        node = engine.parse(text)
+        compiled = compiler.compile_node(node)
+        print(f"{text}  = {compiled(x)}")
+        if python_text is not None:
+            buffer = python_text.format(x=x)
+            bench("eval() per press", lambda: eval(buffer), number)
+        bench("parse + tree-walk", lambda: engine.evaluate(engine.parse(text), x), number)
+        walk = bench("tree-walk", lambda: engine.evaluate(node, x), number)
+        call = bench("compiled", lambda: compiled(x), number)
+        bench("compiled (raw func)", lambda: compiled.func(x), number)
+        print(f"  compiled is {walk / call:.1f}x faster than the tree-walker")
+
+
+if __name__ == "__main__":
+    main()
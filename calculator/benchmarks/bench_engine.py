@@ -0,0 +1,41 @@
+"""Parse and evaluate timings for the expression engine.
+
+The parse column includes tokenizing.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_engine
+"""
+
+import timeit
+
+from calculator import engine
+
+EXPRESSIONS = [
+    "1+2*3",
+    "(1+2)*3-4/5",
+    "2^10+√16-3!",
+    "sin30+cos60*tan45",
+    "2π(3.5+4.25)^2/(1+2+3+4+5+6+7+8+9)",
+]
+
+
+def bench(label, func, tokens, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<10} {seconds * 1e6:8.2f} us  {seconds * 1e9 / tokens:7.1f} ns/token")
+
+
+def main():
+    number = 20000
+    for text in EXPRESSIONS:
+        tokens = len(engine.tokenize(text)) - 1
+        node = engine.parse(text)
+        print(f"{text}  ({tokens} tokens) = {engine.calculate(text)}")
+        bench("tokenize", lambda: engine.tokenize(text), tokens, number)
+        bench("parse", lambda: engine.parse(text), tokens, number)
+        bench("evaluate", lambda: engine.evaluate(node), tokens, number)
+        bench("calculate", lambda: engine.calculate(text), tokens, number)
+
+
+if __name__ == "__main__":
+    main()
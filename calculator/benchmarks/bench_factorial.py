@@ -0,0 +1,49 @@
+"""Factorial strategies for n from 10 to 10^6.
+
+Columns, in seconds:
+  math       math.factorial(n)
+  decimal    factorial.factorial_decimal(n), prime swing on Decimal
+  math+str   math.factorial(n) and its decimal digits
+  dec+str    factorial_decimal(n) and its decimal digits
+  lgamma     factorial.factorial_magnitude(n), size only
+
+math.factorial(10**6) alone takes tens of seconds; pass a smaller maximum
+exponent to skip it:
+
+    python -m calculator.benchmarks.bench_factorial [max_exponent]
+"""
+
+import math
+import sys
+import time
+
+from calculator import factorial
+
+
+def timed(func, n):
+    start = time.perf_counter()
+    result = func(n)
+    return time.perf_counter() - start, result
+
+
+def main():
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    sys.set_int_max_str_digits(0)
+    print(f"{'n':>9} {'math':>9} {'decimal':>9} {'math+str':>9} {'dec+str':>9} {'lgamma':>9}  winner")
+    for exponent in range(1, max_exponent + 1):
+        n = 10**exponent
+        t_math, exact = timed(math.factorial, n)
+        t_decimal, as_decimal = timed(factorial.factorial_decimal, n)
+        t_math_str = t_math + timed(str, exact)[0]
+        t_decimal_str = t_decimal + timed(str, as_decimal)[0]
+        t_lgamma, _ = timed(factorial.factorial_magnitude, n)
+        winner = "math" if t_math_str <= t_decimal_str else "decimal"
+        print(
+            f"{n:>9} {t_math:9.4f} {t_decimal:9.4f} {t_math_str:9.4f} "
+            f"{t_decimal_str:9.4f} {t_lgamma:9.6f}  {winner}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Writes and prefix searches of the history store.
+
+Adds ``--entries`` calculations spread over ``--tapes`` tapes to a new
+database in a temporary directory two ways: a transaction for every entry,
+as writing at every "=" would, and ``HistoryStore``'s batches of up to
+``FLUSH_BATCH``. Then times prefix searches of one tape with the store's
+index, against the same query on a table without it.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_history [--entries N] [--tapes N]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from calculator import history
+
+SEARCHES = 1000
+
+
+def calculations(count, tapes, seed=1):
+    rng = random.Random(seed)
+    ids = [f"{i:016x}" for i in range(tapes)]
+    for _ in range(count):
+        a = rng.randrange(1, 10_000)
+        b = rng.randrange(1, 1000)
+        op = rng.choice("+-*/")
+        yield rng.choice(ids), f"{a}{op}{b}", str(a + b)
+
+
+def per_entry(path, rows):
+    store = history.HistoryStore(path)
+    started = time.perf_counter()
+    for row in rows:
+        store.add(*row)
+        store.flush()
+    seconds = time.perf_counter() - started
+    store.close()
+    return seconds
+
+
+def batched(path, rows):
+    store = history.HistoryStore(path)
+    started = time.perf_counter()
+    for i, row in enumerate(rows, 1):
+        store.add(*row)
+        if i % history.FLUSH_BATCH == 0:
+            store.flush()
+    store.flush()
+    seconds = time.perf_counter() - started
+    store.close()
+    return seconds
+
+
+def searches(path, tape, prefixes):
+    connection = sqlite3.connect(path)
+    started = time.perf_counter()
+    found = 0
+    for prefix in prefixes:
+        found += len(connection.execute(
+            "SELECT expression, result FROM history"
+            " WHERE tape = ? AND expression >= ? AND expression < ?"
+            " ORDER BY id DESC LIMIT 8",
+            (tape, prefix, history.prefix_end(prefix)),
+        ).fetchall())
+    seconds = time.perf_counter() - started
+    connection.close()
+    return seconds, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--tapes", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = list(calculations(args.entries, args.tapes))
+    rng = random.Random(2)
+    prefixes = [str(rng.randrange(1, 100)) for _ in range(SEARCHES)]
+    tape = rows[0][0]
+    with tempfile.TemporaryDirectory() as directory:
+        single = per_entry(os.path.join(directory, "single.db"), rows)
+        path = os.path.join(directory, "batched.db")
+        batch = batched(path, rows)
+        print(f"{'writes':<22} {'ms':>9} {'entries/s':>10}")
+        for name, seconds in (("transaction per entry", single), ("batched", batch)):
+            print(f"{name:<22} {seconds * 1000:9.1f} {len(rows) / seconds:10.0f}")
+
+        indexed, found = searches(path, tape, prefixes)
+        connection = sqlite3.connect(path)
+        connection.execute("DROP INDEX history_prefix")
+        connection.commit()
+        connection.close()
+        scanned, _ = searches(path, tape, prefixes)
+    print(f"{'prefix search':<22} {'us':>9}")
+    for name, seconds in (("indexed", indexed), ("without the index", scanned)):
+        print(f"{name:<22} {seconds / SEARCHES * 1e6:9.1f}")
+    print(f"{SEARCHES} searches of one tape, {found} entries found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Load test: many concurrent calculator sessions against a local server.
+
+Starts ``python -m calculator`` as a web server on a free local port
+(``--workers`` is passed on) and opens simulated web clients, each a
+websocket sending the client's click events like ``bench_clicks``. Every
+client presses the keys of ``TASKS``, one task after another from a random
+one, with a random think time between clicks (exponential, ``--think``
+seconds on average), as someone using the calculator would.
+
+The sessions are added in steps (``--sessions``, e.g. ``25,50,100,200``).
+After a step's sessions are open, its clicks are measured for
+``--duration`` seconds: the time from sending a click until the first
+message of the display update it causes arrives (click to update), and
+the CPU and resident memory of the server and every process it started,
+sampled once a second from /proc (Linux only). Keys that change nothing
+on the display are found beforehand with a single session, and are
+pressed but not timed.
+
+Prints p50/p95/p99 per step and writes every number, with the settings
+and the commit, to a JSON file (``--out``) to compare runs over time. To
+choose ``services.concurrency`` in fly.toml, look for the step where p95
+grows past what is acceptable. Note that the clients run on the same
+machine as the server and take CPU from it.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_load [--sessions 25,50,100,200]
+        [--duration 30] [--think 1.0] [--workers N] [--out FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import websockets
+
+from .bench_clicks import click, click_message, key_ids
+from .bench_sessions import free_port, register_message, wait_for_server
+
+# each starts with AC and leaves a number other than 0 on the display, so
+# that AC always changes it; mode is pressed five times to come back to
+# float
+TASKS = [
+    ["AC", "1", "2", "+", "3", "4", "*", "5", "="],
+    ["AC", "2", "^", "1", "0", "="],
+    ["AC", "9", "√", "+/-", "%"],
+    ["AC", "mode", "1", "/", "3", "=", "mode", "mode", "mode", "mode"],
+    ["AC", "2", "5", "0", "!"],
+    ["AC", "3", "0", "sin", "+", "1", "="],
+    ["AC", "(", "1", ".", "5", "+", "2", ")", "*", "4", "="],
+]
+# a click that has not updated the display after this long is a timeout
+TIMEOUT = 10.0
+SAMPLE_INTERVAL = 1.0
+# sessions opened at once while ramping up
+OPEN_BATCH = 10
+
+
+def percentile(values, q):
+    # nearest rank, of sorted values
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+def process_tree(pid):
+    # pid and all its descendants, from the parents in /proc/*/stat
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    tree = [pid]
+    for p in tree:
+        tree += children.get(p, [])
+    return tree
+
+
+def usage(pid):
+    # (CPU seconds, RSS in KiB) of pid and its descendants
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = 0.0
+    rss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1])
+        except OSError:
+            continue
+        # utime and stime, fields 14 and 15 of stat
+        cpu += (int(fields[11]) + int(fields[12])) / ticks
+    return cpu, rss
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.timeouts = 0
+        self.errors = 0
+        self.samples = []
+
+
+class Client:
+    def __init__(self, port, updates, think, rng):
+        self.port = port
+        self.updates = updates
+        self.think = think
+        self.rng = rng
+        self.waiting = None
+
+    async def read(self, ws):
+        async for _ in ws:
+            if self.waiting is not None and not self.waiting.done():
+                self.waiting.set_result(time.perf_counter())
+
+    async def open(self):
+        self.ws = await websockets.connect(f"ws://127.0.0.1:{self.port}/ws", max_size=None)
+        await self.ws.send(register_message())
+        while True:
+            message = json.loads(await self.ws.recv())
+            if message["action"] in ("pageControlsBatch", "addPageControls"):
+                break
+        self.ids = key_ids(message)
+        self.reader = asyncio.create_task(self.read(self.ws))
+
+    async def press(self, key, updates, recorder):
+        loop = asyncio.get_running_loop()
+        if updates:
+            self.waiting = loop.create_future()
+        sent = time.perf_counter()
+        await self.ws.send(click_message(self.ids[key]))
+        if updates:
+            try:
+                arrived = await asyncio.wait_for(self.waiting, TIMEOUT)
+                recorder.latencies.append(arrived - sent)
+            except asyncio.TimeoutError:
+                recorder.timeouts += 1
+
+    async def run(self, state, stop):
+        # state.recorder is replaced at every step
+        first = self.rng.randrange(len(TASKS))
+        # a non-zero display, as at the end of every task
+        await self.press("1", True, state.warmup)
+        task = first
+        while not stop.is_set():
+            for key, updates in zip(TASKS[task], self.updates[task]):
+                if stop.is_set():
+                    break
+                try:
+                    await self.press(key, updates, state.recorder)
+                except websockets.ConnectionClosed:
+                    state.recorder.errors += 1
+                    return
+                await asyncio.sleep(self.rng.expovariate(1 / self.think))
+            task = (task + 1) % len(TASKS)
+
+    async def close(self):
+        self.reader.cancel()
+        await self.ws.close()
+
+
+async def calibrate(port):
+    # for each key of each task, whether it changes the display
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws", max_size=None) as ws:
+        await ws.send(register_message())
+        while True:
+            message = json.loads(await ws.recv())
+            if message["action"] in ("pageControlsBatch", "addPageControls"):
+                break
+        ids = key_ids(message)
+        await click(ws, ids["1"])
+        updates = []
+        for task in TASKS:
+            flags = []
+            for key in task:
+                _, messages = await click(ws, ids[key])
+                flags.append(bool(messages))
+            updates.append(flags)
+        return updates
+
+
+async def sample(pid, state, stop):
+    cpu, _ = usage(pid)
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(SAMPLE_INTERVAL)
+        now = time.perf_counter()
+        total, rss = usage(pid)
+        state.recorder.samples.append({
+            "time": round(now - state.started, 3),
+            "cpu_percent": round((total - cpu) / (now - last) * 100, 1),
+            "rss_kib": rss,
+        })
+        cpu, last = total, now
+
+
+def summary(recorder, duration):
+    latencies = sorted(recorder.latencies)
+    samples = recorder.samples
+    cpu = [s["cpu_percent"] for s in samples]
+    rss = [s["rss_kib"] for s in samples]
+    ms = lambda value: None if value is None else round(value * 1000, 2)
+    return {
+        "clicks": len(latencies),
+        "clicks_per_second": round(len(latencies) / duration, 1),
+        "timeouts": recorder.timeouts,
+        "errors": recorder.errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "cpu_percent_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+        "cpu_percent_max": max(cpu, default=None),
+        "rss_mib_max": round(max(rss) / 1024, 1) if rss else None,
+    }
+
+
+class State:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.warmup = Recorder()
+        self.recorder = Recorder()
+
+
+async def measure(port, pid, args):
+    rng = random.Random(args.seed)
+    updates = await calibrate(port)
+    state = State()
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample(pid, state, stop))
+    clients = []
+    runners = []
+    steps = []
+    print(f"{'sessions':>8} {'clicks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'timeouts':>8} {'CPU %':>6} {'RSS MiB':>8}")
+    try:
+        for target in args.sessions:
+            # ramp up, unmeasured
+            state.recorder = Recorder()
+            while len(clients) < target:
+                batch = [
+                    Client(port, updates, args.think, random.Random(rng.random()))
+                    for _ in range(min(OPEN_BATCH, target - len(clients)))
+                ]
+                await asyncio.gather(*(c.open() for c in batch))
+                clients += batch
+                runners += [asyncio.create_task(c.run(state, stop)) for c in batch]
+            state.recorder = recorder = Recorder()
+            await asyncio.sleep(args.duration)
+            step = {"sessions": target, **summary(recorder, args.duration)}
+            step["samples"] = recorder.samples
+            steps.append(step)
+            print(
+                f"{target:8} {step['clicks_per_second']:9} {step['p50_ms']:8} "
+                f"{step['p95_ms']:8} {step['p99_ms']:8} {step['timeouts']:8} "
+                f"{step['cpu_percent_mean']:6} {step['rss_mib_max']:8}",
+                flush=True,
+            )
+    finally:
+        stop.set()
+        await asyncio.gather(*runners, return_exceptions=True)
+        await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+        sampler.cancel()
+    return steps
+
+
+def commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions",
+        type=lambda text: sorted(int(n) for n in text.split(",")),
+        default=[25, 50, 100, 200],
+        help="session counts to step through (default: 25,50,100,200)",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured per step")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between clicks")
+    parser.add_argument("--workers", type=int, default=1, help="server processes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="JSON results file (default: bench_load-<time>.json)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    out = args.out or time.strftime("bench_load-%Y%m%d-%H%M%S.json")
+    port = free_port()
+    env = dict(os.environ, FLET_SERVER_PORT=str(port), FLET_SERVER_IP="127.0.0.1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "calculator", "--workers", str(args.workers)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port, process)
+        steps = asyncio.run(measure(port, process.pid, args))
+    finally:
+        process.terminate()
+        process.wait()
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "sessions": args.sessions,
+            "duration": args.duration,
+            "think": args.think,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "steps": steps,
+    }
+    with open(out, "w") as f:
+        json.dump(result, f, indent=1)
+    print(f"results in {out}")
+
+
+if __name__ == "__main__":
+    main()
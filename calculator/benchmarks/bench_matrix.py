@@ -0,0 +1,114 @@
+"""Matrix operations on one core against all cores.
+
+Times ``matrix.run`` for each operation on random n×n matrices, for each n
+of ``--sizes`` (up to 2000, ``matrix.MAX_SIZE``), the best of ``--repeat``
+runs; one run is enough once it takes a second. "eig A" is timed on a
+general matrix and, as "eig sym", on a symmetric one, which takes LAPACK's
+faster symmetric path. "det A" is timed on a normal random matrix scaled
+so that its determinant stays near 1; a uniform one's overflows.
+
+BLAS and LAPACK fix their thread count when NumPy is loaded, so the
+operations are timed in two child processes: one with
+``OPENBLAS_NUM_THREADS``, ``OMP_NUM_THREADS`` and ``MKL_NUM_THREADS`` set
+to 1 and one with them set to the number of CPUs. With a single CPU both
+use one thread. Run from the repository root:
+
+    python -m calculator.benchmarks.bench_matrix [--sizes 100,500,1000,2000] [--repeat N]
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+OPERATIONS = ("A×B", "A⁻¹", "det A", "solve AX=B", "eig A", "eig sym")
+THREAD_VARIABLES = ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def best(function, repeat):
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        if elapsed > 1:
+            break
+    return seconds
+
+
+def time_operations(sizes, repeat):
+    # in the child; {size: {operation: seconds}}
+    import numpy as np
+
+    from calculator import matrix
+
+    rng = np.random.default_rng(1)
+    times = {}
+    for n in sizes:
+        a = rng.random((n, n))
+        b = rng.random((n, n))
+        symmetric = a + a.T
+        # E|det|^2 = n! σ^(2n) for entries of variance σ^2
+        unit = rng.standard_normal((n, n)) * math.sqrt(math.e / n)
+        times[n] = {}
+        for name in OPERATIONS:
+            if name == "eig sym":
+                run = lambda: matrix.run("eig A", symmetric)
+            elif name == "det A":
+                run = lambda: matrix.run(name, unit)
+            elif matrix.OPERATIONS[name][1]:
+                run = lambda: matrix.run(name, a, b)
+            else:
+                run = lambda: matrix.run(name, a)
+            times[n][name] = best(run, repeat)
+    return times
+
+
+def child_times(threads, sizes, repeat):
+    env = dict(os.environ, **{variable: str(threads) for variable in THREAD_VARIABLES})
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "calculator.benchmarks.bench_matrix",
+            "--sizes", ",".join(map(str, sizes)),
+            "--repeat", str(repeat),
+            "--child",
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {int(n): ops for n, ops in json.loads(result.stdout).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,500,1000,2000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    if args.child:
+        print(json.dumps(time_operations(sizes, args.repeat)))
+        return
+    cpus = os.cpu_count() or 1
+    one = child_times(1, sizes, args.repeat)
+    every = child_times(cpus, sizes, args.repeat)
+    print(f"{'n':>5} {'operation':<11} {'1 core ms':>10} {'all cores ms':>13} {'speedup':>8}")
+    for n in sizes:
+        for name in OPERATIONS:
+            single, multiple = one[n][name], every[n][name]
+            print(
+                f"{n:5} {name:<11} {single * 1000:10.1f} {multiple * 1000:13.1f}"
+                f" {single / multiple:8.2f}"
+            )
+    print(f"all cores: {cpus} BLAS threads" + (", the same as one" if cpus == 1 else ""))
+
+
+if __name__ == "__main__":
+    main()
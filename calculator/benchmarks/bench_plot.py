@@ -0,0 +1,46 @@
+"""Sampling time and payload size for the graph view.
+
+The payload column is the JSON size of the points that would be sent to
+the Flet client, before and after LTTB downsampling to the point budget.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_plot
+"""
+
+import json
+import time
+
+from calculator import plot
+
+CASES = [
+    ("x^3-2x", -10, 10),
+    ("tan x", -360, 360),
+    ("sin(20x)/x", -90, 90),
+    ("√(100-x^2)", -10, 10),
+    ("x!", -5, 5),
+]
+BUDGET = 310
+
+
+def payload(segments):
+    points = [[[float(x), float(y)] for x, y in zip(xs, ys)] for xs, ys in segments]
+    return len(json.dumps(points))
+
+
+def main():
+    for text, x_min, x_max in CASES:
+        start = time.perf_counter()
+        xs, ys = plot.adaptive_sample(text, x_min, x_max, max_points=BUDGET * 16)
+        raw = plot.split_segments(xs, ys)
+        sampled = time.perf_counter() - start
+        reduced = plot.plot_points(text, x_min, x_max, BUDGET)
+        print(
+            f"{text:<12} {len(xs):5} samples in {sampled * 1e3:5.1f} ms, "
+            f"payload {payload(raw):7} -> {payload(reduced):6} bytes "
+            f"({sum(len(seg_xs) for seg_xs, _ in reduced)} points, {len(reduced)} segments)"
+        )
+
+
+if __name__ == "__main__":
+    main()
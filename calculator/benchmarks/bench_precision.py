@@ -0,0 +1,71 @@
+"""Cost per operation of the precision modes.
+
+For every expression and mode: the time of ``precision.evaluate_text``
+divided by the expression's number of operations, with the expression cache
+warm as it is in the app. "decimal*" is the same precision with the float
+fast path switched off (``FLOAT_DIGITS = 0``) to show what it saves.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_precision
+"""
+
+import timeit
+
+from calculator import precision
+
+EXPRESSIONS = [
+    "0.1+0.2",
+    "2^64-1",
+    "(1.5+2.25)*3-4/5",
+    "√2*√8/3",
+    "1.25^10/7",
+    "2π(3.5+4.25)^2/(1+2+3+4+5+6+7+8+9)",
+    "sin30+cos60*tan45",
+]
+
+MODES = [
+    ("float", precision.DEFAULT_PRECISION),
+    ("decimal", 12),
+    ("decimal", 28),
+    ("decimal", 50),
+    ("fraction", precision.DEFAULT_PRECISION),
+]
+
+
+def count_operations(node):
+    kind = node[0]
+    if kind == "bin":
+        return 1 + count_operations(node[2]) + count_operations(node[3])
+    if kind in ("call", "neg"):
+        return 1 + count_operations(node[-1])
+    return 0
+
+
+def time_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    number = 2000
+    fast_digits = precision.FLOAT_DIGITS
+    for text in EXPRESSIONS:
+        print(text)
+        for mode, digits in MODES:
+            operations = max(count_operations(precision.parse(text, mode)), 1)
+            result = precision.calculate(text, mode, digits)
+            labels = [(mode, fast_digits)]
+            if mode == "decimal":
+                labels.append(("decimal*", 0))
+            for label, limit in labels:
+                precision.FLOAT_DIGITS = limit
+                seconds = time_per_call(
+                    lambda: precision.evaluate_text(text, mode, digits), number
+                )
+                name = f"{label} {digits}" if mode == "decimal" else label
+                print(f"  {name:<12} {seconds * 1e9 / operations:9.0f} ns/op  {result}")
+            precision.FLOAT_DIGITS = fast_digits
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Cost of the live preview per keystroke.
+
+Types each expression a character at a time and times the preview of
+every prefix, once with ``Preview`` (only the edited term is parsed
+again) and once parsing and evaluating the whole completed prefix each
+time. The preview is also debounced (``buffer_app.PREVIEW_INTERVAL``), so a
+burst of keys costs one of these, not one per key.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_preview
+"""
+
+import timeit
+
+from calculator import engine
+from calculator.preview import Preview, complete
+
+EXPRESSIONS = [
+    "12+34*5-6/7",
+    "1+2+3+4+5+6+7+8+9+10+11+12+13+14+15+16+17+18+19+20",
+    "(1.5+2.25)*3-4/5+√2*√8/3-sin30+cos60*tan45",
+    "170!/168!+2^64-1+100!/98!",
+]
+
+
+def whole(text):
+    text = complete(text)
+    if text:
+        engine.calculate(text)
+
+
+def type_incremental(prefixes):
+    preview = Preview()
+    for text in prefixes:
+        preview.display(text)
+
+
+def type_whole(prefixes):
+    for text in prefixes:
+        whole(text)
+
+
+def time_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    number = 200
+    print(f"{'keys':>5} {'incremental':>12} {'whole text':>11}  expression")
+    for text in EXPRESSIONS:
+        prefixes = [text[:i] for i in range(1, len(text) + 1)]
+        incremental = time_per_call(lambda: type_incremental(prefixes), number)
+        full = time_per_call(lambda: type_whole(prefixes), number)
+        keys = len(prefixes)
+        print(
+            f"{keys:5} {incremental * 1e6 / keys:9.1f} us {full * 1e6 / keys:8.1f} us  {text}"
+        )
+    print("(time per keystroke)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Replays recorded sessions without a Flet page.
+
+Reads every keylog (see ``calculator.keylog``) in the given files and
+directories, by default the corpus in ``benchmarks/sessions``, presses its
+keys on a new ``CalculatorApp`` of the app that recorded it, as fast as it
+can, and checks every display update against the log. Reports the keys
+replayed per second for each app, the best of ``--repeat`` rounds, and
+every log whose replay differs; exits with status 1 if any does.
+
+Record sessions with ``CALC_RECORD=<directory>`` set for the server.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_replay [--repeat N] [path ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from calculator import keylog
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+
+
+def log_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".keys"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[CORPUS], help="keylogs or directories")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logs = [(path, *keylog.read(path)) for path in log_paths(args.paths)]
+    if not logs:
+        sys.exit("no keylogs")
+    failed = []
+    # app -> [keys, best seconds]
+    totals = {}
+    for path, app, lines in logs:
+        keys = sum(len(line_keys) for line_keys, _ in lines)
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            mismatch = keylog.replay(app, lines)
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+            if mismatch is not None:
+                index, expected, shown = mismatch
+                failed.append(
+                    f"{path}: line {index + 2} ({' '.join(lines[index][0])}): "
+                    f"expected {expected!r}, got {shown!r}"
+                )
+                break
+        total = totals.setdefault(app, [0, 0.0])
+        total[0] += keys
+        total[1] += best
+
+    print(f"{'app':<8} {'keys':>7} {'ms':>9} {'keys/s':>9}")
+    for app, (keys, seconds) in sorted(totals.items()):
+        print(f"{app:<8} {keys:7} {seconds * 1000:9.1f} {keys / seconds:9.0f}")
+    print(f"{len(logs)} logs, {len(failed)} differ")
+    for line in failed:
+        print(line)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Memory per session of the served app.
+
+Starts ``python -m calculator`` as a web server on a free local port,
+opens sessions the way the browser client does (a websocket sending
+``registerWebClient``), waits until each session has sent its controls and
+reports the server's resident set size (RSS) as sessions are added. Reads
+RSS from /proc, so Linux only.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_sessions [max_sessions]
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import websockets
+
+STEPS = [1, 5, 10, 25, 50, 100, 200]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_kib(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("no VmRSS")
+
+
+def wait_for_server(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def register_message():
+    payload = {
+        "pageName": "",
+        "pageRoute": "/",
+        "pageWidth": "400",
+        "pageHeight": "800",
+        "windowWidth": "400",
+        "windowHeight": "800",
+        "windowTop": "0",
+        "windowLeft": "0",
+        "isPWA": "false",
+        "isWeb": "true",
+        "isDebug": "false",
+        "platform": "linux",
+        "platformBrightness": "light",
+        "media": "{}",
+        "sessionId": "",
+    }
+    return json.dumps({"action": "registerWebClient", "payload": payload})
+
+
+async def open_session(port):
+    ws = await websockets.connect(f"ws://127.0.0.1:{port}/ws", max_size=None)
+    await ws.send(register_message())
+    # the register response, then the controls the app adds to the page
+    received = 0
+    while True:
+        message = json.loads(await ws.recv())
+        received += len(json.dumps(message))
+        if message["action"] in ("pageControlsBatch", "addPageControls"):
+            return ws, received
+
+
+async def measure(port, pid, steps):
+    sessions = []
+    base = rss_kib(pid)
+    print(f"{'sessions':>8} {'RSS MiB':>9} {'KiB/session':>12} {'KiB sent/session':>17}")
+    print(f"{0:>8} {base / 1024:9.1f}")
+    sent = 0
+    for target in steps:
+        while len(sessions) < target:
+            ws, received = await open_session(port)
+            sessions.append(ws)
+            sent += received
+        await asyncio.sleep(1)
+        rss = rss_kib(pid)
+        print(
+            f"{target:>8} {rss / 1024:9.1f} {(rss - base) / target:12.1f} "
+            f"{sent / 1024 / target:17.1f}",
+            flush=True,
+        )
+    for ws in sessions:
+        await ws.close()
+
+
+def main():
+    max_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else STEPS[-1]
+    steps = [n for n in STEPS if n <= max_sessions]
+    port = free_port()
+    env = dict(os.environ, FLET_SERVER_PORT=str(port), FLET_SERVER_IP="127.0.0.1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "calculator"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port, process)
+        asyncio.run(measure(port, process.pid, steps))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Time to find every real root of a few equations.
+
+Compares ``solver.solve`` (parsed once, the grid evaluated by NumPy, the
+brackets refined by Newton steps with compiled derivatives) with the same
+grid and bisection done the way a string-buffer calculator would: parsing
+the text again for every value of x. Both search ``solver``'s default
+interval; the second finds only the roots where the sign changes.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_solve [--repeat N]
+"""
+
+import argparse
+import time
+
+from calculator import engine, solver
+
+EQUATIONS = [
+    "x^3-2*x=5",
+    "x^3-x",
+    "(x-1)^2*(x+3)",
+    "cos(x)*x=1",
+    "sin(x)=0.5",
+    "2^x=1000",
+    "x!=24",
+    "tan(x)=1",
+]
+# fewer points than solver's grid, the reparsing search is slow enough
+REPARSE_POINTS = 401
+
+
+def reparsed(text, x):
+    left, _, right = text.partition("=")
+    try:
+        value = engine.evaluate(engine.parse(left), x)
+        if right:
+            value -= engine.evaluate(engine.parse(right), x)
+        return float(value)
+    except engine.CalcError:
+        return None
+
+
+def reparsing_solve(text):
+    lo, hi = solver.DEFAULT_INTERVAL
+    step = (hi - lo) / (REPARSE_POINTS - 1)
+    roots = []
+    previous = None
+    for i in range(REPARSE_POINTS):
+        x = lo + i * step
+        y = reparsed(text, x)
+        if y == 0:
+            roots.append(x)
+        elif y is not None and previous is not None and (y < 0) != (previous[1] < 0):
+            a, fa, b = previous[0], previous[1], x
+            for _ in range(60):
+                m = (a + b) / 2
+                fm = reparsed(text, m)
+                if fm is None:
+                    break
+                if (fm < 0) == (fa < 0):
+                    a, fa = m, fm
+                else:
+                    b = m
+            if fm is not None and abs(fm) < abs(fa) + abs(y):
+                roots.append((a + b) / 2)
+        previous = None if y is None else (x, y)
+    return roots
+
+
+def best(function, text, repeat):
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(text)
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    return seconds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'equation':<16} {'roots':>5} {'solve ms':>9} {'reparse':>7} {'ms':>7}  roots")
+    for text in EQUATIONS:
+        solve_seconds, roots = best(solver.solve, text, args.repeat)
+        reparse_seconds, reparse_roots = best(reparsing_solve, text, 1)
+        shown = ", ".join(f"{root:.6g}" for root in roots[:4])
+        print(
+            f"{text:<16} {len(roots):5} {solve_seconds * 1000:9.2f} "
+            f"{len(reparse_roots):7} {reparse_seconds * 1000:7.1f}  {shown}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Startup time of the served app, against a budget.
+
+Imports: runs ``python -X importtime -c "import <module>"`` for each module
+in ``IMPORT_BUDGETS`` and reports the cumulative import time of the module
+and of its slowest dependencies, and whether Flet was imported. The engine
+modules must not import Flet at all.
+
+Time to first frame: starts ``python -m calculator`` as a web server on a
+free local port and measures the time from starting the process until a
+session opened the way the browser client does has received the app's
+controls, the best of ``RUNS``.
+
+Exits with status 1 when a time is over its budget. Run from the
+repository root:
+
+    python -m calculator.benchmarks.bench_startup [-v]
+
+``-v`` also prints the ten slowest imports of each module.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import websockets
+
+from .bench_sessions import free_port, register_message
+
+# module -> seconds
+IMPORT_BUDGETS = {
+    "calculator": 0.05,
+    "calculator.engine": 0.05,
+    "calculator.precision": 0.1,
+    "calculator.api": 0.15,
+    "calculator.__main__": 0.05,
+    "calculator.app": 1.0,
+    "calculator.buffer_app": 1.2,
+    "calculator.matrix": 0.2,
+    "calculator.matrix_app": 1.2,
+    "calculator.stats": 0.2,
+    "calculator.stats_app": 1.2,
+}
+# these may import Flet
+UI_MODULES = {
+    "calculator.app",
+    "calculator.buffer_app",
+    "calculator.matrix_app",
+    "calculator.stats_app",
+}
+FIRST_FRAME_BUDGET = 3.0
+RUNS = 3
+
+
+def import_times(module):
+    # [(cumulative seconds, name)] of module and everything it imported, from
+    # -X importtime, which reports on stderr; an import is listed after the
+    # imports it made, indented one level deeper
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative) / 1e6, name.strip(), len(name) - len(name.lstrip())))
+    end = max(i for i, (_, name, _) in enumerate(times) if name == module)
+    start = end
+    while start > 0 and times[start - 1][2] > times[end][2]:
+        start -= 1
+    return [(t, name) for t, name, _ in times[start : end + 1]]
+
+
+async def first_frame(port, process, started, timeout=60):
+    # connect as soon as the server accepts, then wait for the controls
+    deadline = started + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError("server exited")
+        if time.perf_counter() > deadline:
+            raise RuntimeError("server did not start")
+        try:
+            ws = await websockets.connect(f"ws://127.0.0.1:{port}/ws", max_size=None)
+            break
+        except (OSError, websockets.exceptions.InvalidHandshake):
+            # not listening yet; behind docker, the handshake fails instead
+            await asyncio.sleep(0.01)
+    async with ws:
+        await ws.send(register_message())
+        while True:
+            message = json.loads(await ws.recv())
+            if message["action"] in ("pageControlsBatch", "addPageControls"):
+                return time.perf_counter() - started
+
+
+def time_to_first_frame():
+    port = free_port()
+    env = dict(os.environ, FLET_SERVER_PORT=str(port), FLET_SERVER_IP="127.0.0.1")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "calculator"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(first_frame(port, process, started))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    verbose = "-v" in sys.argv[1:]
+    over = []
+    print(f"{'module':<24} {'import ms':>10} {'budget':>7}  flet")
+    for module, budget in IMPORT_BUDGETS.items():
+        times = import_times(module)
+        total = times[-1][0]
+        flet = any(name == "flet" for _, name in times)
+        print(f"{module:<24} {total * 1000:10.1f} {budget * 1000:7.0f}  {'yes' if flet else 'no'}")
+        if verbose:
+            for t, name in sorted(times, reverse=True)[1:11]:
+                print(f"    {t * 1000:10.1f}  {name}")
+        if total > budget:
+            over.append(f"import {module}")
+        if flet and module not in UI_MODULES:
+            over.append(f"import {module} imports flet")
+
+    frames = [time_to_first_frame() for _ in range(RUNS)]
+    best = min(frames)
+    print(
+        f"time to first frame {best * 1000:.0f} ms "
+        f"(budget {FIRST_FRAME_BUDGET * 1000:.0f} ms, best of {RUNS})"
+    )
+    if best > FIRST_FRAME_BUDGET:
+        over.append("time to first frame")
+
+    if over:
+        print("over budget: " + ", ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Streaming statistics of a pasted column against keeping every value.
+
+Builds the text of ``--values`` random numbers, one per line as a pasted
+column would be, and reads it two ways: ``stats.chunks`` into a
+``RunningStats``, and every value into one array for NumPy's exact mean,
+variance and quantiles. Reports the time, the peak memory allocated
+besides the text (from ``tracemalloc``, in a second run), and how far
+each estimated quantile is from the exact one, as a difference in rank.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_stats [--values N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from calculator import stats
+
+
+def streamed(text):
+    running = stats.RunningStats()
+    for chunk in stats.chunks(text):
+        running.add_many(chunk)
+    return running.mean, running.variance, [running.quantile(q) for q in stats.QUANTILES]
+
+
+def kept(text):
+    values = np.array(text.split(), dtype=float)
+    return values.mean(), values.var(ddof=1), list(np.quantile(values, stats.QUANTILES))
+
+
+def measure(function, text):
+    started = time.perf_counter()
+    result = function(text)
+    seconds = time.perf_counter() - started
+    # again for the memory, tracemalloc slows it down
+    tracemalloc.start()
+    function(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    values = np.random.default_rng(1).lognormal(size=args.values)
+    text = "\n".join(map(repr, values.tolist()))
+    ordered = np.sort(values)
+    print(f"{args.values} values, {len(text) / 1e6:.1f} MB of text")
+    print(f"{'':<10} {'s':>6} {'peak MB':>8}  quantile rank errors")
+    for name, function in (("streamed", streamed), ("kept", kept)):
+        seconds, peak, (_, _, quantiles) = measure(function, text)
+        errors = " ".join(
+            f"{abs(np.searchsorted(ordered, value) / len(ordered) - q):.0e}"
+            for value, q in zip(quantiles, stats.QUANTILES)
+        )
+        print(f"{name:<10} {seconds:6.2f} {peak / 1e6:8.1f}  {errors}")
+
+
+if __name__ == "__main__":
+    main()
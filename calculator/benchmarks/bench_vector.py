@@ -0,0 +1,45 @@
+"""One vectorized pass over a million x values against a Python loop.
+
+Run from the repository root:
+
+    python -m calculator.benchmarks.bench_vector
+"""
+
+import time
+
+import numpy as np
+
+from calculator import compiler, engine, vector
+
+EXPRESSIONS = ["x^3-2x+1", "sin x + cos(2x)", "√(x^2+1)/x", "(x/100)!"]
+POINTS = 1_000_000
+LOOP_POINTS = 100_000
+
+
+def main():
+    xs = np.linspace(-500, 500, POINTS)
+    loop_xs = xs[:: POINTS // LOOP_POINTS].tolist()
+    for text in EXPRESSIONS:
+        start = time.perf_counter()
+        result = vector.evaluate_many(text, xs)
+        vectorized = time.perf_counter() - start
+
+        compiled = compiler.compile_node(engine.parse(text))
+        start = time.perf_counter()
+        for x in loop_xs:
+            try:
+                compiled(x)
+            except engine.CalcError:
+                pass
+        looped = (time.perf_counter() - start) * POINTS / len(loop_xs)
+
+        errors = int(np.isnan(result).sum())
+        print(
+            f"{text:<16} vectorized {vectorized * 1e3:8.1f} ms, "
+            f"compiled loop ~{looped * 1e3:8.1f} ms ({looped / vectorized:5.1f}x), "
+            f"{errors} errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
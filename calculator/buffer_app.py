@@ -0,0 +1,363 @@
+"""The string-buffer calculator.
+
+Keys build up an expression in a buffer that "=" evaluates as a whole,
+with x for graphs and a live preview of the buffer's value. With x in the
+buffer, "=" starts the right-hand side of an equation and "solve" shows
+its real roots (see ``solver``). ∫ and Σ take their arguments separated by
+"," (see ``calculus``). Start it with
+``python -m calculator --app buffer``.
+"""
+
+import asyncio
+import threading
+
+import flet as ft
+
+from . import engine, keylog, precision, solver
+from .cache import shared_cache
+from .graph import GraphView
+from .preview import Preview
+from .worker import EvaluationCancelled, shared_pool
+
+# the preview is evaluated at most once per this many seconds
+PREVIEW_INTERVAL = 0.1
+# roots listed after solving, the rest are counted
+SHOWN_ROOTS = 8
+
+
+# ベースボタンクラス
+class CalcButton(ft.ElevatedButton):
+    def __init__(self, text, on_click, expand=1):
+        super().__init__(text=text, on_click=on_click, expand=expand)
+
+
+class DigitButton(CalcButton):
+    def __init__(self, text, on_click, expand=1):
+        super().__init__(text, on_click, expand)
+        self.bgcolor = ft.colors.WHITE24
+        self.color = ft.colors.WHITE
+
+
+class ActionButton(CalcButton):
+    def __init__(self, text, on_click):
+        super().__init__(text, on_click)
+        self.bgcolor = ft.colors.ORANGE
+        self.color = ft.colors.WHITE
+
+class ExtraActionButton(CalcButton):
+    def __init__(self, text, on_click):
+        super().__init__(text, on_click)
+        self.bgcolor = ft.colors.BLUE_GREY_100
+        self.color = ft.colors.BLACK
+
+class CalculatorApp(ft.Container):
+    def __init__(self):
+        super().__init__()
+        self.result = ft.Text(value="0", color=ft.colors.WHITE, size=20)
+        self.current_value = ["0"]  
+        self.graph = GraphView()
+        # all digits of a result shown in scientific notation, on tap
+        self.digits = ft.Text(color=ft.colors.WHITE, size=12, selectable=True, visible=False)
+        self.expandable = None
+        self.roots = ft.Text(color=ft.colors.WHITE, size=12, selectable=True, visible=False)
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        self.cancel_event = threading.Event()
+        self.busy = False
+        self.mode = "float"
+        self.precision = precision.DEFAULT_PRECISION
+        # the value of the buffer as it is typed
+        self.preview = ft.Text(color=ft.colors.WHITE54, size=14)
+        self.previewer = Preview()
+        self.preview_pending = False
+        # None unless CALC_RECORD is set
+        self.keylog = keylog.open_log("buffer")
+        button_clicked = self.button_clicked
+
+        self.width = 350
+        self.bgcolor = ft.colors.BLACK
+        self.border_radius = ft.border_radius.all(20)
+        self.padding = 20
+        self.content = ft.Column(
+            controls=[
+                ft.Row(
+                    controls=[
+                        self.progress,
+                        # a Container rather than a GestureDetector, which
+                        # carries a couple of dozen event handlers
+                        ft.Container(content=self.result, on_click=self.expand_result),
+                    ],
+                    alignment="end",
+                ),
+                ft.Row(controls=[self.preview], alignment="end"),
+                self.digits,
+                self.roots,
+                ft.Row(
+                    controls=[
+                        ExtraActionButton(text="AC", on_click=button_clicked),
+                        ExtraActionButton(text="+/-", on_click=button_clicked),
+                        ExtraActionButton(text="%", on_click=button_clicked),
+                        ActionButton(text="/", on_click=button_clicked),
+                        ActionButton(text="√", on_click=button_clicked),
+                        ActionButton(text="^", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        DigitButton(text="7", on_click=button_clicked),
+                        DigitButton(text="8", on_click=button_clicked),
+                        DigitButton(text="9", on_click=button_clicked),
+                        ActionButton(text="*", on_click=button_clicked),
+                        DigitButton(text="π", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        DigitButton(text="4", on_click=button_clicked),
+                        DigitButton(text="5", on_click=button_clicked),
+                        DigitButton(text="6", on_click=button_clicked),
+                        ActionButton(text="-", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        DigitButton(text="1", on_click=button_clicked),
+                        DigitButton(text="2", on_click=button_clicked),
+                        DigitButton(text="3", on_click=button_clicked),
+                        ActionButton(text="+", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        DigitButton(text="0", expand=2, on_click=button_clicked),
+                        DigitButton(text=".", on_click=button_clicked),
+                        ActionButton(text="=", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        DigitButton(text="(", on_click=button_clicked),
+                        DigitButton(text=")", on_click=button_clicked),
+                        DigitButton(text="x", on_click=button_clicked),
+                        ExtraActionButton(text="!", on_click=button_clicked),
+                        ExtraActionButton(text="sin", on_click=button_clicked),
+                        ExtraActionButton(text="cos", on_click=button_clicked),
+                        ExtraActionButton(text="tan", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        ExtraActionButton(text="∫", on_click=button_clicked),
+                        ExtraActionButton(text="Σ", on_click=button_clicked),
+                        DigitButton(text=",", on_click=button_clicked),
+                        DigitButton(text="n", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(
+                    controls=[
+                        ExtraActionButton(text="graph", on_click=button_clicked),
+                        ExtraActionButton(text="mode", on_click=button_clicked),
+                        ExtraActionButton(text="solve", on_click=button_clicked),
+                    ]
+                ),
+                self.graph,
+            ]
+        )
+
+    def button_clicked(self, e):
+        data = e.control.text
+        cancel = self.cancel_event
+        changed = []
+        if not self.press_key(data, changed):
+            return
+        # only what the key changed, not the whole keypad
+        self.page.update(self.result, self.progress, *changed)
+        # a calculation an AC cancelled left nothing to replay
+        if self.keylog is not None and (data == "AC" or not cancel.is_set()):
+            self.keylog.record([data], self.result.value)
+        self.schedule_preview()
+
+    def press_key(self, data, changed):
+        # False when the key is ignored while a calculation runs
+        if not self.busy and self.digits.visible:
+            self.digits.visible = False
+            self.digits.value = None
+            changed.append(self.digits)
+        if not self.busy and self.roots.visible:
+            self.roots.visible = False
+            self.roots.value = None
+            changed.append(self.roots)
+        if data == "AC":
+            # stops a calculation still running for this session
+            self.cancel_event.set()
+            self.cancel_event = threading.Event()
+            self.current_value[0] = "0"
+            if self.graph.visible:
+                self.graph.hide()
+                changed.append(self.graph)
+        elif self.busy:
+            return False
+        elif data == "graph":
+            self.graph.show(self.current_value[0])
+            changed.append(self.graph)
+        elif data == "mode":
+            self.next_mode()
+        elif data == "+/-":
+            self.toggle_sign()
+        elif data == "%":
+            self.calculate_percent()
+        elif data == "=" and self.starts_equation():
+            self.current_value[0] += "="
+        elif data == "=":
+            self.calculate_result()
+        elif data == "solve":
+            self.solve_equation()
+            changed.append(self.roots)
+        elif data == "√":
+            self.calculate_square_root()
+        elif data == "^":
+            self.current_value[0] += "^"
+        elif data in ("∫", "Σ"):
+            self.handle_input(data + "(")
+        elif data in ("sin", "cos", "tan"):
+            self.calculate_trigonometric(data)
+        elif data == "!":
+            self.calculate_factorial()
+        else:
+            self.handle_input(data)
+
+        self.result.value = self.current_value[0]
+        return True
+
+    def toggle_sign(self):
+        if self.current_value[0].startswith("-"):
+            self.current_value[0] = self.current_value[0][1:]
+        else:
+            self.current_value[0] = "-" + self.current_value[0]
+
+    def calculate_percent(self):
+        self.apply_function("%")
+
+    def calculate_result(self):
+        self.current_value[0] = self.run_calculation(self.current_value[0])
+
+    def starts_equation(self):
+        # "=" after an expression in x types the equals sign; the x of ∫
+        # and Σ is their own
+        text = self.current_value[0]
+        if "=" in text:
+            return False
+        try:
+            return engine.has_variable(engine.parse(text))
+        except engine.CalcError:
+            return False
+
+    def solve_equation(self):
+        # the buffer stays, so the equation can be changed and solved again
+        try:
+            roots = solver.solve(self.current_value[0])
+        except engine.CalcError as error:
+            self.roots.value = f"Error: {error}"
+        else:
+            if not roots:
+                lo, hi = solver.DEFAULT_INTERVAL
+                self.roots.value = f"no real roots in [{lo:g}, {hi:g}]"
+            else:
+                shown = ", ".join(engine.format_number(root) for root in roots[:SHOWN_ROOTS])
+                more = len(roots) - SHOWN_ROOTS
+                self.roots.value = f"x = {shown}" + (f" and {more} more" if more > 0 else "")
+        self.roots.visible = True
+
+    def calculate_square_root(self):
+        self.apply_function("√")
+
+    def calculate_trigonometric(self, function):
+        self.apply_function(function)
+
+    def calculate_factorial(self):
+        self.apply_function("!")
+
+    def apply_function(self, name):
+        # the function applies to the value of the whole buffer
+        if name in ("!", "%"):
+            text = f"({self.current_value[0]}){name}"
+        else:
+            text = f"{name}({self.current_value[0]})"
+        self.current_value[0] = self.run_calculation(text)
+
+    def next_mode(self):
+        # float, then exact decimals, then fractions
+        modes = precision.MODES
+        self.mode = modes[(modes.index(self.mode) + 1) % len(modes)]
+
+    def run_calculation(self, text):
+        if self.mode != "float":
+            self.expandable = None
+            return precision.calculate(text, self.mode, self.precision)
+        entry = shared_cache.get(text)
+        if entry.expensive and entry.display is None:
+            # runs in a worker process, show the progress ring meanwhile
+            self.busy = True
+            self.progress.visible = True
+            if self.page is not None:
+                # not when replayed without a page, see keylog
+                self.progress.update()
+        try:
+            display = shared_cache.calculate(text, cancel=self.cancel_event)
+        except EvaluationCancelled:
+            # AC has already reset the buffer
+            return self.current_value[0]
+        finally:
+            self.busy = False
+            self.progress.visible = False
+        # shortened, the digits are only built if the user taps it
+        self.expandable = entry.compiled.node if "e+" in display else None
+        return display
+
+    def expand_result(self, e):
+        if self.expandable is None or self.busy or self.current_value[0] == "0":
+            return
+        self.busy = True
+        self.progress.visible = True
+        self.progress.update()
+        try:
+            self.digits.value = shared_pool.expand(self.expandable, cancel=self.cancel_event)
+            self.digits.visible = True
+        except EvaluationCancelled:
+            pass
+        except engine.CalcError:
+            self.digits.value = "Error"
+            self.digits.visible = True
+        finally:
+            self.busy = False
+            self.progress.visible = False
+        self.page.update(self.progress, self.digits)
+
+    def schedule_preview(self):
+        # a burst of keys gets one evaluation, after the interval
+        if not self.preview_pending:
+            self.preview_pending = True
+            self.page.run_task(self.preview_later)
+
+    async def preview_later(self):
+        await asyncio.sleep(PREVIEW_INTERVAL)
+        self.preview_pending = False
+        self.page.run_thread(self.show_preview)
+
+    def show_preview(self):
+        text = self.current_value[0]
+        display = self.previewer.display(text, self.mode, self.precision)
+        # nothing to add when the buffer is already a number
+        self.preview.value = "" if display is None or display == text else f"= {display}"
+        self.preview.update()
+
+    def handle_input(self, data):
+        if self.current_value[0] == "0":
+            self.current_value[0] = data
+        else:
+            self.current_value[0] += data
+
+
+def main(page: ft.Page):
+    page.title = "Calc App"
+    calc = CalculatorApp()
+    page.add(calc)
@@ -0,0 +1,140 @@
+"""Process-wide cache of parsed and compiled expressions.
+
+Every session of the web app runs in the same process, so one bounded LRU
+keyed by the normalized expression text is shared by all of them. Entries
+hold the compiled expression and, when the expression has no x, its value
+and display text as well, so a repeated "=" costs a dict lookup. Invalid
+expressions are cached too, as an entry without a compiled form.
+
+Expressions that need a worker process (see ``worker.needs_worker``) are
+not evaluated when they are added; ``calculate`` runs them in the shared
+worker pool and keeps the display text once it is known.
+"""
+
+import threading
+from collections import OrderedDict
+
+from . import compiler, engine
+from .worker import EvaluationCancelled, EvaluationTimeout, needs_worker, shared_pool
+
+_REPLACEMENTS = (("**", "^"), ("×", "*"), ("÷", "/"), ("−", "-"), ("pi", "π"))
+
+
+def normalize(text):
+    text = "".join(text.split())
+    for old, new in _REPLACEMENTS:
+        if old in text:
+            text = text.replace(old, new)
+    return text
+
+
+class CacheEntry:
+    __slots__ = ("compiled", "value", "display", "expensive")
+
+    def __init__(self, compiled, value=None, display=None, expensive=False):
+        self.compiled = compiled
+        self.value = value
+        self.display = display
+        self.expensive = expensive
+
+
+def _build_entry(text):
+    try:
+        compiled = compiler.CompiledExpression(engine.parse(text))
+    except (engine.CalcError, SyntaxError, RecursionError):
+        # SyntaxError from compile() if the source is still too deep for it
+        return CacheEntry(None, display="Error")
+    expensive = needs_worker(compiled.node)
+    if compiled.has_variable or expensive:
+        return CacheEntry(compiled, expensive=expensive)
+    try:
+        value = compiled()
+    except engine.CalcError:
+        return CacheEntry(compiled, display="Error")
+    try:
+        return CacheEntry(compiled, value, engine.format_number(value))
+    except ValueError:
+        # too many digits for str()
+        return CacheEntry(compiled, value, "Error")
+
+
+class ExpressionCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        key = normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # parse and compile outside the lock; two sessions racing on the
+        # same new expression just build it twice
+        entry = _build_entry(key)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def evaluate(self, text, x=None):
+        entry = self.get(text)
+        if entry.compiled is None:
+            raise engine.CalcError(f"cannot parse {text!r}")
+        if entry.value is not None:
+            return entry.value
+        if not entry.compiled.has_variable and not entry.expensive:
+            raise engine.CalcError(f"cannot evaluate {text!r}")
+        return entry.compiled(x)
+
+    def calculate(self, text, x=None, cancel=None, timeout=None):
+        # EvaluationCancelled is passed on so the caller can tell AC apart
+        # from an error
+        entry = self.get(text)
+        if entry.display is not None:
+            return entry.display
+        if entry.expensive:
+            try:
+                display = shared_pool.evaluate(entry.compiled.node, x, cancel, timeout)
+            except EvaluationTimeout:
+                return "Error"
+            except EvaluationCancelled:
+                raise
+            except engine.CalcError:
+                display = "Error"
+            if not entry.compiled.has_variable:
+                entry.display = display
+            return display
+        try:
+            return engine.format_number(entry.compiled(x))
+        except (engine.CalcError, ValueError):
+            return "Error"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+shared_cache = ExpressionCache()
@@ -176,4 +176,5 @@ def main(page: ft.Page):
     page.add(calc)
 
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
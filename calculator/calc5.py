@@ -158,7 +158,7 @@ class CalculatorApp(ft.Container):
                 self.result.value = "Error"
             self.new_operand = True
 
-        self.update()
+        self.result.update()
 
     def format_number(self, num):
         if num % 1 == 0:
@@ -194,4 +194,5 @@ def main(page: ft.Page):
     calc = CalculatorApp()
     page.add(calc)
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
@@ -0,0 +1,276 @@
+"""∫ and Σ: numerical integration and summation of an expression.
+
+``integrate`` is adaptive Gauss–Kronrod quadrature (7 Gauss and 15
+Kronrod points). All the intervals of a round are evaluated in a single
+``vector.evaluate_many`` call over a (intervals, 15) array. The
+difference between the Gauss and the Kronrod estimate of an interval is
+its error. Intervals are halved where their error is more than their share
+of the tolerance, until the total error is within it.
+
+``summation`` adds up the terms of a whole-number range:
+
+* a term that is a polynomial in the variable is summed in closed form
+  (Faulhaber's formula), exactly when its coefficients are, whatever the
+  range;
+* a short range is added term by term with the scalar engine, so whole
+  terms stay exact;
+* otherwise the range is evaluated ``CHUNK`` terms at a time with NumPy.
+  Every chunk is summed pairwise, and the chunk sums are accumulated with
+  Neumaier's compensated (Kahan) summation.
+
+Both are evaluated in floating point; an integrand or a term that is
+undefined somewhere in the range is an error.
+"""
+
+import functools
+import math
+from fractions import Fraction
+
+import numpy as np
+
+from . import engine, vector
+
+# nodes and weights of the 15-point Kronrod rule on [-1, 1] and of the
+# 7-point Gauss rule whose nodes it extends
+_KRONROD_NODES = (
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+    0.0,
+)
+_KRONROD_WEIGHTS = (
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+    0.209482141084727828012999174891714,
+)
+# for the Kronrod nodes 1, 3, 5 and 7 (the middle)
+_GAUSS_WEIGHTS = (
+    0.129484966168869693270611432679082,
+    0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975,
+    0.417959183673469387755102040816327,
+)
+NODES = np.array([-x for x in _KRONROD_NODES[:-1]] + list(reversed(_KRONROD_NODES)))
+KRONROD = np.array(_KRONROD_WEIGHTS[:-1] + tuple(reversed(_KRONROD_WEIGHTS)))
+GAUSS = np.zeros(15)
+for _i, _weight in zip((1, 3, 5, 7), _GAUSS_WEIGHTS):
+    GAUSS[_i] = GAUSS[14 - _i] = _weight
+
+RELATIVE_TOLERANCE = 1e-10
+ABSOLUTE_TOLERANCE = 1e-12
+MAX_ROUNDS = 200
+MAX_INTERVALS = 10_000
+
+# terms evaluated by NumPy at once; small enough to stay in the cache
+CHUNK = 1 << 16
+# ranges up to this many terms are added by the scalar engine
+SCALAR_TERMS = 1000
+MAX_TERMS = 10**9
+# highest power of a term summed in closed form
+MAX_DEGREE = 32
+
+
+def evaluate(kind, body, lo, hi):
+    if kind == "integral":
+        return integrate(body, lo, hi)
+    return summation(body, lo, hi)
+
+
+# --- ∫ ---
+
+
+def _gauss_kronrod(body, intervals):
+    # the Kronrod estimate and the error of every interval
+    center = (intervals[:, 0] + intervals[:, 1]) / 2
+    half = (intervals[:, 1] - intervals[:, 0]) / 2
+    ys = vector.evaluate_many(body, center[:, None] + half[:, None] * NODES)
+    if np.isnan(ys).any():
+        raise engine.CalcError("the integrand is undefined in the interval")
+    # sums of products rather than a matrix product: no BLAS threads in a
+    # forked worker
+    kronrod = half * (ys * KRONROD).sum(axis=1)
+    gauss = half * (ys * GAUSS).sum(axis=1)
+    return kronrod, np.abs(kronrod - gauss)
+
+
+def integrate(body, a, b):
+    a = float(a)
+    b = float(b)
+    if a == b:
+        return 0.0
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+    if not (math.isfinite(a) and math.isfinite(b)):
+        raise engine.CalcError("the bounds must be finite")
+    intervals = np.array([[a, b]])
+    values, errors = _gauss_kronrod(body, intervals)
+    for _ in range(MAX_ROUNDS):
+        tolerance = max(ABSOLUTE_TOLERANCE, RELATIVE_TOLERANCE * abs(math.fsum(values)))
+        if errors.sum() <= tolerance:
+            return sign * math.fsum(values)
+        split = errors > tolerance / len(intervals)
+        halves = intervals[split]
+        middle = (halves[:, 0] + halves[:, 1]) / 2
+        if len(intervals) + len(halves) > MAX_INTERVALS or (
+            (middle <= halves[:, 0]) | (middle >= halves[:, 1])
+        ).any():
+            break
+        children = np.concatenate([
+            np.column_stack((halves[:, 0], middle)),
+            np.column_stack((middle, halves[:, 1])),
+        ])
+        child_values, child_errors = _gauss_kronrod(body, children)
+        keep = ~split
+        intervals = np.concatenate((intervals[keep], children))
+        values = np.concatenate((values[keep], child_values))
+        errors = np.concatenate((errors[keep], child_errors))
+    raise engine.CalcError("the integral does not converge")
+
+
+# --- Σ ---
+
+
+def _whole(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise engine.CalcError("the bounds of Σ must be whole numbers")
+
+
+def _add(p, q):
+    if len(p) < len(q):
+        p, q = q, p
+    return [a + b for a, b in zip(p, q)] + p[len(q):]
+
+
+def _multiply(p, q):
+    if len(p) + len(q) - 2 > MAX_DEGREE:
+        return None
+    product = [0] * (len(p) + len(q) - 1)
+    for i, a in enumerate(p):
+        if a:
+            for j, b in enumerate(q):
+                product[i + j] += a * b
+    return product
+
+
+def polynomial(node):
+    # the coefficients of node as a polynomial in its variable, lowest
+    # power first, or None if it is not one
+    if not engine.has_variable(node):
+        return [engine.evaluate(node)]
+    kind = node[0]
+    if kind == "var":
+        return [0, 1]
+    if kind == "neg":
+        p = polynomial(node[1])
+        return None if p is None else [-c for c in p]
+    if kind != "bin":
+        return None
+    op = node[1]
+    p = polynomial(node[2])
+    if p is None:
+        return None
+    if op == "^":
+        exponent = node[3]
+        if engine.has_variable(exponent):
+            return None
+        n = engine.evaluate(exponent)
+        if isinstance(n, float) and n.is_integer():
+            n = int(n)
+        if not isinstance(n, int) or n < 0 or (len(p) - 1) * n > MAX_DEGREE:
+            return None
+        result = [1]
+        for _ in range(n):
+            result = _multiply(result, p)
+        return result
+    q = polynomial(node[3])
+    if q is None:
+        return None
+    if op == "+":
+        return _add(p, q)
+    if op == "-":
+        return _add(p, [-c for c in q])
+    if op == "*":
+        return _multiply(p, q)
+    if len(q) != 1 or q[0] == 0:
+        return None
+    # "/" by a constant, exact for whole numbers
+    d = q[0]
+    return [Fraction(c, d) if isinstance(c, int) and isinstance(d, int) else c / d for c in p]
+
+
+@functools.lru_cache(maxsize=None)
+def _bernoulli(n):
+    # B_n with B_1 = +1/2, as Faulhaber's formula below wants it
+    if n == 0:
+        return Fraction(1)
+    return 1 - sum(math.comb(n, k) * _bernoulli(k) / (n - k + 1) for k in range(n))
+
+
+def _power_sum(k, n):
+    # 1^k + 2^k + ... + n^k; a polynomial in n, so also right for n <= 0
+    # as the difference that power_sums takes
+    return sum(
+        math.comb(k + 1, j) * _bernoulli(j) * Fraction(n) ** (k + 1 - j) for j in range(k + 1)
+    ) / (k + 1)
+
+
+def power_sums(coefficients, lo, hi):
+    # Σ of the polynomial over lo..hi
+    digits = len(coefficients) * math.log10(max(abs(lo), abs(hi), 1) + 1)
+    if digits > engine.MAX_INT_DIGITS:
+        raise engine.CalcError("result too large")
+    total = 0
+    for k, c in enumerate(coefficients):
+        if c:
+            total += c * (_power_sum(k, hi) - _power_sum(k, lo - 1))
+    if isinstance(total, Fraction):
+        return total.numerator if total.denominator == 1 else float(total)
+    return total
+
+
+def summation(body, lo, hi):
+    lo = _whole(lo)
+    hi = _whole(hi)
+    if hi < lo:
+        return 0
+    coefficients = polynomial(body)
+    if coefficients is not None:
+        return power_sums(coefficients, lo, hi)
+    count = hi - lo + 1
+    if count <= SCALAR_TERMS:
+        terms = [engine.evaluate(body, n) for n in range(lo, hi + 1)]
+        if all(isinstance(term, int) for term in terms):
+            return sum(terms)
+        return math.fsum(terms)
+    if count > MAX_TERMS:
+        raise engine.CalcError("too many terms")
+    if max(abs(lo), abs(hi)) > 2**53:
+        raise engine.CalcError("the bounds of Σ are too large")
+    total = 0.0
+    compensation = 0.0
+    for start in range(lo, hi + 1, CHUNK):
+        terms = vector.evaluate_many(body, np.arange(start, min(start + CHUNK, hi + 1), dtype=float))
+        if np.isnan(terms).any():
+            raise engine.CalcError("a term is undefined")
+        # pairwise within the chunk, Neumaier across chunks
+        partial = float(terms.sum())
+        added = total + partial
+        if abs(total) >= abs(partial):
+            compensation += (total - added) + partial
+        else:
+            compensation += (partial - added) + total
+        total = added
+    return total + compensation
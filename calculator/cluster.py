@@ -0,0 +1,246 @@
+"""Serving the app from several processes, one per core.
+
+``serve`` starts ``workers`` server processes, each a ``python -m
+calculator`` listening on its own Unix socket, and runs a front in this
+process that accepts connections on the public port and passes each one
+on, byte for byte, to one of them. A Flet session lives in the process
+that created it and the client reconnects to it by its session id, so the
+front sends a client to the same process every time, chosen by its
+address: ``Fly-Client-IP`` or the first ``X-Forwarded-For`` behind a
+proxy, the peer's address otherwise. ``GET /metrics`` is answered by the
+front with the sum of every process's metrics.
+
+A process that exits is started again. On SIGINT (``kill_signal`` in
+fly.toml) or SIGTERM the front stops accepting connections and passes the
+signal on: every process finishes the requests it is serving, closes its
+sessions (1012, service restart, which the client answers by connecting
+again, to another machine) and exits within ``api.DRAIN_TIMEOUT``. A
+second signal stops them at once.
+
+The front does not import Flet or the engine.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+import zlib
+
+from . import metrics
+
+# a request head larger than this is not passed on
+MAX_HEAD_BYTES = 64 * 1024
+# how long a started process may take to listen
+START_TIMEOUT = 60.0
+# a process that exits this soon after starting is not started again at
+# once, so one that cannot start does not spin
+RESTART_DELAY = 1.0
+
+logger = logging.getLogger("calculator.cluster")
+
+
+def client_key(head, peer):
+    # the client's address, as seen by the proxy in front of us if any
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"fly-client-ip" and value.strip():
+            return value.strip()
+        if name == b"x-forwarded-for" and value.strip():
+            return value.split(b",")[0].strip()
+    return peer.encode()
+
+
+class Worker:
+    def __init__(self, index, app, directory):
+        self.index = index
+        self.app = app
+        self.path = os.path.join(directory, f"worker-{index}.sock")
+        self.process = None
+        self.ready = False
+        self.started = 0.0
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.started = time.monotonic()
+        # a process group of its own: SIGINT from a terminal reaches only
+        # the front, which decides when to pass it on
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "calculator", "--app", self.app, "--uds", self.path,
+            process_group=0,
+        )
+        deadline = self.started + START_TIMEOUT
+        while time.monotonic() < deadline and self.process.returncode is None:
+            try:
+                _, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(0.05)
+                continue
+            writer.close()
+            self.ready = True
+            return
+        raise RuntimeError(f"worker {self.index} did not start")
+
+    def signal(self, signum):
+        if self.process is not None and self.process.returncode is None:
+            self.process.send_signal(signum)
+
+
+class Front:
+    def __init__(self, app, workers, directory):
+        self.workers = [Worker(i, app, directory) for i in range(workers)]
+        self.draining = False
+        self.connections = set()
+        self.server = None
+
+    def pick(self, key):
+        # the same worker for the same client, unless it is being started
+        # again; then the next one that is ready
+        start = zlib.crc32(key) % len(self.workers)
+        for i in range(len(self.workers)):
+            worker = self.workers[(start + i) % len(self.workers)]
+            if worker.ready:
+                return worker
+        return None
+
+    async def handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+                return
+            if head.startswith(b"GET /metrics "):
+                await self.metrics(writer)
+                return
+            peer = writer.get_extra_info("peername")
+            worker = self.pick(client_key(head, peer[0] if peer else ""))
+            if worker is None:
+                writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+                return
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_unix_connection(worker.path)
+            except OSError:
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+                return
+            upstream_writer.write(head)
+            sending = asyncio.create_task(pipe(reader, upstream_writer))
+            # the connection is over when the worker is done with it
+            await pipe(upstream_reader, writer)
+            sending.cancel()
+            upstream_writer.close()
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def metrics(self, writer):
+        texts = []
+        for worker in self.workers:
+            if worker.ready:
+                try:
+                    texts.append(await scrape(worker.path))
+                except (OSError, ValueError):
+                    pass
+        body = metrics.merge(texts).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/plain; version=0.0.4\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+
+    async def supervise(self, worker):
+        while True:
+            try:
+                await worker.start()
+            except RuntimeError:
+                if self.draining:
+                    return
+                raise
+            code = await worker.process.wait()
+            worker.ready = False
+            if self.draining:
+                return
+            logger.warning("worker %d exited with %s, starting it again", worker.index, code)
+            await asyncio.sleep(max(0.0, worker.started + RESTART_DELAY - time.monotonic()))
+
+    def drain(self, signum):
+        if self.draining:
+            # the second signal: stop now
+            for worker in self.workers:
+                worker.signal(signal.SIGKILL)
+            return
+        logger.info("draining")
+        self.draining = True
+        self.server.close()
+        for worker in self.workers:
+            worker.signal(signal.SIGINT)
+
+    async def run(self, host, port):
+        loop = asyncio.get_running_loop()
+        supervisors = [asyncio.create_task(self.supervise(w)) for w in self.workers]
+        while not all(w.ready for w in self.workers):
+            for task in supervisors:
+                if task.done():
+                    # a worker that could not start
+                    task.result()
+            await asyncio.sleep(0.05)
+        self.server = await asyncio.start_server(
+            self.handle, host, port, limit=MAX_HEAD_BYTES
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.drain, signum)
+        logger.info("serving on http://%s:%d with %d workers", host, port, len(self.workers))
+        try:
+            await asyncio.gather(*supervisors)
+        finally:
+            for worker in self.workers:
+                worker.signal(signal.SIGKILL)
+            # whatever is left ends as its worker is gone
+            for writer in list(self.connections):
+                writer.close()
+
+
+async def pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except OSError:
+        pass
+    finally:
+        # half-close, so the worker can still answer
+        if writer.can_write_eof() and not writer.is_closing():
+            try:
+                writer.write_eof()
+            except OSError:
+                pass
+
+
+async def scrape(path):
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: worker\r\nConnection: close\r\n\r\n")
+        response = await reader.read()
+    finally:
+        writer.close()
+    status, _, body = response.partition(b"\r\n\r\n")
+    if b" 200 " not in status.split(b"\r\n")[0]:
+        raise ValueError("metrics scrape failed")
+    return body.decode()
+
+
+def serve(app, workers, port, host):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    with tempfile.TemporaryDirectory(prefix="calculator-") as directory:
+        asyncio.run(Front(app, workers, directory).run(host, port))
@@ -0,0 +1,215 @@
+"""Compile engine ASTs into Python functions.
+
+The AST is turned into the source of a ``lambda x=None: ...`` and compiled
+once. The generated code only refers to the helpers in ``_NAMESPACE`` (the
+same functions the tree-walker uses) and has no builtins, so running it is
+just a function call. ``+ - *`` and unary minus become native Python
+operators since their semantics match the engine's.
+
+``compile_derivative`` does the same for forward-mode automatic
+differentiation: every node becomes a line computing its value and one
+computing its derivative from those of its operands, so the function
+returns both in one pass and a shared subexpression is not repeated.
+"""
+
+import functools
+import math
+
+from . import engine
+
+_NATIVE_OPS = {"+": "+", "-": "-", "*": "*"}
+_HELPER_NAMES = {
+    "/": "_div",
+    "^": "_pow",
+    "sin": "_sin",
+    "cos": "_cos",
+    "tan": "_tan",
+    "√": "_sqrt",
+    "!": "_factorial",
+    "%": "_percent",
+}
+
+
+def _calculus(kind, body, lo, hi):
+    # NumPy is only imported once an expression needs it
+    from . import calculus
+
+    return calculus.evaluate(kind, body, lo, hi)
+
+
+_NAMESPACE = {"__builtins__": {}, "_calculus": _calculus}
+for _name, _helper in _HELPER_NAMES.items():
+    _NAMESPACE[_helper] = engine.BINARY_OPS.get(_name) or engine.FUNCTIONS[_name]
+# degrees to radians, for the derivatives of sin cos tan
+_RAD = math.pi / 180
+
+
+def _leibniz(body, a, b, da, db):
+    # the derivative of ∫(body, a, b) through its bounds
+    if not da and not db:
+        return 0.0
+    return engine.evaluate(body, b) * db - engine.evaluate(body, a) * da
+
+
+def _dpow(a, b, da, db, value):
+    # the derivative of a^b; log(a) only when the exponent depends on x
+    if db == 0:
+        return b * _NAMESPACE["_pow"](a, b - 1) * da if da else 0.0
+    return value * (db * math.log(a) + b * da / a)
+
+
+_DUAL_NAMESPACE = dict(_NAMESPACE, _dpow=_dpow, _leibniz=_leibniz, _RAD=_RAD, _nan=math.nan)
+# value line, derivative line of each function, of operand a and its
+# derivative da
+_DUAL_FUNCTIONS = {
+    "sin": ("_sin({a})", "_cos({a}) * {da} * _RAD"),
+    "cos": ("_cos({a})", "-_sin({a}) * {da} * _RAD"),
+    "tan": ("_tan({a})", "{da} * _RAD / _cos({a}) ** 2"),
+    "√": ("_sqrt({a})", "{da} / (2 * {v})"),
+    # the derivative of the gamma function is not in math; Newton steps
+    # that need it fall back on the bracket
+    "!": ("_factorial({a})", "_nan"),
+    "%": ("{a} / 100", "{da} / 100"),
+}
+
+
+def to_source(node):
+    kind = node[0]
+    if kind == engine.NUM:
+        return repr(node[1])
+    if kind == "bin":
+        op = node[1]
+        left = to_source(node[2])
+        right = to_source(node[3])
+        if op in _NATIVE_OPS:
+            return f"({left} {op} {right})"
+        return f"{_HELPER_NAMES[op]}({left}, {right})"
+    if kind == "call":
+        return f"{_HELPER_NAMES[node[1]]}({to_source(node[2])})"
+    if kind == "neg":
+        return f"(-{to_source(node[1])})"
+    if kind in engine.CALCULUS_KINDS:
+        # the body is evaluated by calculus, it stays an AST
+        return f"_calculus({kind!r}, {node[1]!r}, {to_source(node[2])}, {to_source(node[3])})"
+    return "x"
+
+
+class CompiledExpression:
+    __slots__ = ("node", "source", "func", "has_variable")
+
+    def __init__(self, node):
+        # the source nests as deep as the AST, and compile() refuses more
+        # than 200 levels of parentheses
+        if engine.depth(node) > engine.MAX_DEPTH:
+            raise engine.CalcError("too deeply nested")
+        self.node = node
+        self.has_variable = engine.has_variable(node)
+        self.source = to_source(node)
+        code = compile(f"lambda x=None: {self.source}", "<calculator>", "eval")
+        self.func = eval(code, dict(_NAMESPACE))
+
+    def __call__(self, x=None):
+        if x is None and self.has_variable:
+            raise engine.CalcError("x has no value")
+        try:
+            result = self.func(x)
+        except engine.CalcError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise engine.CalcError(str(e)) from e
+        if isinstance(result, float) and not math.isfinite(result):
+            raise engine.CalcError("result is not finite")
+        return result
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+def to_dual_source(node, lines):
+    # appends the lines computing node to lines; returns the names (or
+    # literals) of its value and its derivative
+    kind = node[0]
+    if kind == engine.NUM:
+        return repr(node[1]), "0"
+    if kind == "var":
+        return "x", "1"
+    if kind == "neg":
+        a, da = to_dual_source(node[1], lines)
+        v = f"v{len(lines) // 2}"
+        lines += [f"{v} = -{a}", f"d{v} = -{da}"]
+    elif kind in engine.CALCULUS_KINDS:
+        a, da = to_dual_source(node[2], lines)
+        b, db = to_dual_source(node[3], lines)
+        v = f"v{len(lines) // 2}"
+        lines.append(f"{v} = _calculus({kind!r}, {node[1]!r}, {a}, {b})")
+        if kind == "integral":
+            lines.append(f"d{v} = _leibniz({node[1]!r}, {a}, {b}, {da}, {db})")
+        else:
+            # a step function of its bounds
+            lines.append(f"d{v} = 0")
+    elif kind == "call":
+        a, da = to_dual_source(node[2], lines)
+        v = f"v{len(lines) // 2}"
+        value, derivative = _DUAL_FUNCTIONS[node[1]]
+        lines += [f"{v} = " + value.format(a=a), f"d{v} = " + derivative.format(a=a, da=da, v=v)]
+    else:
+        op = node[1]
+        a, da = to_dual_source(node[2], lines)
+        b, db = to_dual_source(node[3], lines)
+        v = f"v{len(lines) // 2}"
+        if op in _NATIVE_OPS:
+            lines.append(f"{v} = {a} {op} {b}")
+        else:
+            lines.append(f"{v} = {_HELPER_NAMES[op]}({a}, {b})")
+        if op in "+-":
+            lines.append(f"d{v} = {da} {op} {db}")
+        elif op == "*":
+            lines.append(f"d{v} = {da} * {b} + {a} * {db}")
+        elif op == "/":
+            lines.append(f"d{v} = ({da} * {b} - {a} * {db}) / ({b} * {b})")
+        else:
+            lines.append(f"d{v} = _dpow({a}, {b}, {da}, {db}, {v})")
+    return v, f"d{v}"
+
+
+class CompiledDerivative:
+    __slots__ = ("node", "source", "func")
+
+    def __init__(self, node):
+        self.node = node
+        lines = []
+        value, derivative = to_dual_source(node, lines)
+        body = "".join(f"    {line}\n" for line in lines)
+        self.source = f"def dual(x):\n{body}    return {value}, {derivative}\n"
+        namespace = dict(_DUAL_NAMESPACE)
+        exec(compile(self.source, "<calculator>", "exec"), namespace)
+        self.func = namespace["dual"]
+
+    def __call__(self, x):
+        # (value, derivative) at x; the derivative may be NaN
+        try:
+            value, derivative = self.func(x)
+        except (engine.CalcError, ArithmeticError, ValueError, TypeError):
+            # the value alone, which raises CalcError if it is the value
+            # that failed rather than its derivative, e.g. √x at 0
+            return engine.evaluate(self.node, x), math.nan
+        if isinstance(value, float) and not math.isfinite(value):
+            raise engine.CalcError("result is not finite")
+        return value, derivative
+
+    def __repr__(self):
+        return f"CompiledDerivative({self.source!r})"
+
+
+@functools.lru_cache(maxsize=256)
+def compile_node(node):
+    return CompiledExpression(node)
+
+
+def compile_expression(text):
+    return compile_node(engine.parse(text))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_derivative(node):
+    return CompiledDerivative(node)
@@ -0,0 +1,73 @@
+"""Display text for results of any size.
+
+Turning an int into its decimal string is quadratic in CPython and refused
+beyond 4300 digits, and the display could not show a long string anyway.
+Integers longer than ``MAX_DISPLAY_DIGITS`` are therefore shown in
+scientific notation built without that conversion: the leading digits come
+from the top bits of the number scaled by a power of two in a
+short-precision Decimal context, and trailing digits, when wanted, from
+``n % 10**k``. The full digit string is only produced when the user asks for
+it (see ``worker.WorkerPool.expand``). Floats are shown as ``str`` shows
+them, so from 1e16 on in scientific notation too, and whole ones below
+that without ".0".
+"""
+
+import decimal
+import math
+
+MAX_DISPLAY_DIGITS = 1000
+SIGNIFICANT_DIGITS = 12
+
+_LOG10_2 = math.log10(2)
+
+
+def leading_digits(n, significant=SIGNIFICANT_DIGITS):
+    # (digits, exponent) with n ≈ d.ddd × 10^exponent, digits truncated
+    # rather than rounded
+    n = abs(n)
+    shift = max(n.bit_length() - 4 * significant - 64, 0)
+    context = decimal.Context(
+        prec=significant + 20, Emax=decimal.MAX_EMAX, rounding=decimal.ROUND_DOWN
+    )
+    approx = context.multiply(
+        decimal.Decimal(n >> shift), context.power(decimal.Decimal(2), shift)
+    )
+    digits = "".join(map(str, approx.as_tuple().digits))
+    exponent = approx.adjusted()
+    head = digits[: significant + 10]
+    if shift and head.count("9") == len(head) and n >= 10 ** (exponent + 1):
+        # the truncated approximation fell just short of a power of ten
+        return "1" + "0" * (significant - 1), exponent + 1
+    return digits[:significant].ljust(significant, "0"), exponent
+
+
+def digit_count(n):
+    if n == 0:
+        return 1
+    return leading_digits(n, 1)[1] + 1
+
+
+def trailing_digits(n, count):
+    return str(abs(n) % 10**count).zfill(count)
+
+
+def format_scientific(n, significant=SIGNIFICANT_DIGITS):
+    digits, exponent = leading_digits(n, significant)
+    mantissa = digits[0]
+    rest = digits[1:].rstrip("0")
+    if rest:
+        mantissa += "." + rest
+    sign = "-" if n < 0 else ""
+    return f"{sign}{mantissa}e+{exponent}"
+
+
+def format_number(num):
+    if isinstance(num, int):
+        if num.bit_length() * _LOG10_2 < MAX_DISPLAY_DIGITS - 1:
+            return str(num)
+        return format_scientific(num)
+    if isinstance(num, float) and num.is_integer() and abs(num) < 1e16:
+        # beyond that a float's digits are not exact, and str() switches to
+        # scientific notation
+        return str(int(num))
+    return str(num)
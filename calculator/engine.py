@@ -0,0 +1,422 @@
+"""Expression engine for the calculator, independent of Flet.
+
+Text is tokenized once, parsed into a small tuple-based AST and then
+evaluated. AST nodes are plain tuples so they are cheap to build, hash and
+cache:
+
+    ("num", value)           number literal (int or float), also π
+    ("var", "x")             the x variable
+    ("neg", operand)         unary minus
+    ("bin", op, left, right) one of + - * / ^
+    ("call", name, operand)  sin cos tan √ ! %
+    ("integral", body, a, b) ∫(body, a, b), over x
+    ("sum", body, a, b)      Σ(body, n, a, b), over the whole numbers
+
+Precedence from loosest to tightest: ``+ -``, ``* /`` (and implicit
+multiplication such as ``2π`` or ``3(4+1)``), unary minus, ``^`` (right
+associative), prefix functions ``sin cos tan √``, postfix ``! %``.
+Trigonometric functions work in degrees like the buttons always did. An
+AST deeper than ``MAX_DEPTH`` is a ``CalcError``, not a ``RecursionError``.
+
+``n`` is another name for ``x``. In the body of ∫ and Σ it is the
+variable they run over, whichever name is used (see ``calculus``); outside
+them both are the x of graphs and equations.
+"""
+
+import math
+import re
+
+from . import factorial
+from .display import format_number
+
+NUM = "num"
+NAME = "name"
+OP = "op"
+END = "end"
+
+# Results with more digits than this are refused instead of being built.
+MAX_INT_DIGITS = 4300
+# Expressions nested deeper than this, in parentheses or in a chain such as
+# 1+1+...+1, are refused, so that every walk of the AST and the compiled
+# source (see ``compiler``) stay within Python's limits.
+MAX_DEPTH = 150
+
+_NUMBER_RE = re.compile(r"(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?")
+_NAME_RE = re.compile(r"sin|cos|tan|pi|int|sum")
+_NAMES = {
+    "sin": (NAME, "sin"),
+    "cos": (NAME, "cos"),
+    "tan": (NAME, "tan"),
+    "pi": (NAME, "π"),
+    "int": (NAME, "∫"),
+    "sum": (NAME, "Σ"),
+}
+# single characters map straight to a shared token tuple, whitespace to None
+_SIMPLE_TOKENS = {c: (OP, c) for c in "+-*/^!%(),"}
+_SIMPLE_TOKENS.update({
+    "×": (OP, "*"),
+    "÷": (OP, "/"),
+    "−": (OP, "-"),
+    "π": (NAME, "π"),
+    "√": (NAME, "√"),
+    "x": (NAME, "x"),
+    "n": (NAME, "n"),
+    "∫": (NAME, "∫"),
+    "Σ": (NAME, "Σ"),
+    "∑": (NAME, "Σ"),
+    " ": None,
+    "\t": None,
+    "\n": None,
+})
+_POW_TOKEN = (OP, "^")
+_END_TOKEN = (END, None)
+
+
+class CalcError(ValueError):
+    pass
+
+
+def tokenize(text, number_type=float):
+    tokens = []
+    append = tokens.append
+    simple = _SIMPLE_TOKENS
+    pos = 0
+    end = len(text)
+    while pos < end:
+        ch = text[pos]
+        token = simple.get(ch, False)
+        if token is not False:
+            pos += 1
+            if token is None:
+                continue
+            if ch == "*" and text.startswith("*", pos):
+                # eval-style "**"
+                token = _POW_TOKEN
+                pos += 1
+            append(token)
+            continue
+        m = _NUMBER_RE.match(text, pos)
+        if m is not None:
+            number = m.group()
+            if number.isdigit():
+                if len(number) > MAX_INT_DIGITS:
+                    raise CalcError("number too long")
+                append((NUM, int(number)))
+            else:
+                value = number_type(number)
+                if value == math.inf:
+                    # e.g. a shortened huge result such as "4.02e+2567"
+                    raise CalcError("number too large")
+                append((NUM, value))
+            pos = m.end()
+            continue
+        m = _NAME_RE.match(text, pos)
+        if m is None:
+            raise CalcError(f"unexpected character {ch!r} at {pos}")
+        append(_NAMES[m.group()])
+        pos = m.end()
+    append(_END_TOKEN)
+    return tokens
+
+
+_FUNCTION_NAMES = frozenset(("sin", "cos", "tan", "√"))
+_POSTFIX_OPS = frozenset(("!", "%"))
+_BINARY_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2}
+# ∫ and Σ, which take their arguments in parentheses
+CALCULUS = {"∫": "integral", "Σ": "sum"}
+CALCULUS_KINDS = frozenset(CALCULUS.values())
+
+
+class _Parser:
+    # precedence climbing for the binary operators; unary minus, prefix
+    # functions, postfix operators and "^" are handled in parse_unary
+    __slots__ = ("tokens", "pos")
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self):
+        if self.tokens[0][0] == END:
+            raise CalcError("empty expression")
+        node = self.parse_binary(1)
+        kind, value = self.tokens[self.pos]
+        if kind != END:
+            raise CalcError(f"unexpected {value!r}")
+        return node
+
+    def parse_binary(self, min_precedence):
+        node = self.parse_unary()
+        tokens = self.tokens
+        while True:
+            kind, value = tokens[self.pos]
+            if kind == OP and value != "(":
+                precedence = _BINARY_PRECEDENCE.get(value, 0)
+                if precedence < min_precedence:
+                    return node
+                self.pos += 1
+            elif kind == END or min_precedence > 2:
+                return node
+            elif kind == NUM:
+                # "1.2.3", "2 3": two numbers with nothing between them
+                raise CalcError(f"missing operator before {value!r}")
+            else:
+                # implicit multiplication: 2π, 3(4+1), 2sin30
+                value = "*"
+                precedence = 2
+            node = ("bin", value, node, self.parse_binary(precedence + 1))
+
+    def parse_unary(self, power=True):
+        # power=False for the operand of a prefix function, which stops
+        # before "^": sin30^2 is sin(30)^2
+        tokens = self.tokens
+        kind, value = tokens[self.pos]
+        self.pos += 1
+        if kind == NUM:
+            node = (NUM, value)
+        elif kind == NAME:
+            if value in _FUNCTION_NAMES:
+                node = ("call", value, self.parse_unary(False))
+            elif value == "π":
+                node = (NUM, math.pi)
+            elif value in CALCULUS:
+                node = self.parse_calculus(value)
+            else:
+                node = ("var", value)
+        elif value == "-":
+            return ("neg", self.parse_unary(power))
+        elif value == "+":
+            return self.parse_unary(power)
+        elif value == "(":
+            node = self.parse_binary(1)
+            kind, value = tokens[self.pos]
+            if value == ")":
+                self.pos += 1
+            elif kind != END:
+                # an unclosed "(" is closed at the end of input, anything
+                # else is an error
+                raise CalcError(f"unexpected {value!r}")
+        elif kind == END:
+            raise CalcError("unexpected end of expression")
+        else:
+            raise CalcError(f"unexpected {value!r}")
+
+        while True:
+            kind, value = tokens[self.pos]
+            if kind != OP:
+                return node
+            if value == "^":
+                if not power:
+                    return node
+                self.pos += 1
+                return ("bin", "^", node, self.parse_unary())
+            if value not in _POSTFIX_OPS:
+                return node
+            self.pos += 1
+            node = ("call", value, node)
+
+    def expect(self, expected):
+        kind, value = self.tokens[self.pos]
+        if value == expected:
+            self.pos += 1
+        elif expected != ")" or kind != END:
+            # like "(", the last ")" may be left out
+            raise CalcError(f"expected {expected!r}")
+
+    def parse_calculus(self, name):
+        # ∫(body, a, b) or Σ(body, n, a, b)
+        if self.tokens[self.pos] != (OP, "("):
+            raise CalcError(f"{name} needs its arguments in parentheses")
+        self.pos += 1
+        body = self.parse_binary(1)
+        if name == "Σ":
+            self.expect(",")
+            if self.parse_binary(1)[0] != "var":
+                raise CalcError("Σ needs the name of its variable, n or x")
+        self.expect(",")
+        lo = self.parse_binary(1)
+        self.expect(",")
+        hi = self.parse_binary(1)
+        self.expect(")")
+        return (CALCULUS[name], body, lo, hi)
+
+
+def depth(node):
+    # without recursion, for a tree of any depth
+    deepest = 0
+    stack = [(node, 1)]
+    while stack:
+        node, level = stack.pop()
+        deepest = max(deepest, level)
+        stack.extend((child, level + 1) for child in node[1:] if isinstance(child, tuple))
+    return deepest
+
+
+def parse(text, number_type=float):
+    # number_type converts the literals that are not integers, e.g. Decimal
+    # keeps every digit the user typed
+    tokens = tokenize(text, number_type)
+    try:
+        node = _Parser(tokens).parse()
+    except RecursionError:
+        raise CalcError("too deeply nested") from None
+    # no node has fewer tokens than its depth; a chain such as 1+1+...+1 is
+    # as deep as a nesting, though the parser builds it in a loop
+    if len(tokens) > MAX_DEPTH and depth(node) > MAX_DEPTH:
+        raise CalcError("too deeply nested")
+    return node
+
+
+def _add(a, b):
+    return a + b
+
+
+def _sub(a, b):
+    return a - b
+
+
+def _mul(a, b):
+    return a * b
+
+
+def _div(a, b):
+    if b == 0:
+        raise CalcError("division by zero")
+    if isinstance(a, int) and isinstance(b, int) and a % b == 0:
+        return a // b
+    return a / b
+
+
+def _pow(a, b):
+    if isinstance(a, int) and isinstance(b, int) and b >= 0:
+        if abs(a) > 1 and b * math.log10(abs(a)) > MAX_INT_DIGITS:
+            raise CalcError("result too large")
+        return a ** b
+    return math.pow(a, b)
+
+
+def _sqrt(v):
+    if v < 0:
+        raise CalcError("square root of a negative number")
+    return math.sqrt(v)
+
+
+def _sin(v):
+    return math.sin(math.radians(v))
+
+
+def _cos(v):
+    return math.cos(math.radians(v))
+
+
+def _tan(v):
+    if v % 180 == 90:
+        raise CalcError("tan is undefined here")
+    return math.tan(math.radians(v))
+
+
+def _factorial(v):
+    if isinstance(v, int) or v.is_integer():
+        if v < 0:
+            raise CalcError("factorial of a negative integer")
+        n = int(v)
+        if factorial.log10_factorial(n) > MAX_INT_DIGITS:
+            raise CalcError("result too large")
+        return factorial.factorial(n)
+    return math.gamma(v + 1)
+
+
+def _percent(v):
+    # exact for an int that 100 divides, like 1000!
+    return _div(v, 100)
+
+
+BINARY_OPS = {
+    "+": _add,
+    "-": _sub,
+    "*": _mul,
+    "/": _div,
+    "^": _pow,
+}
+
+FUNCTIONS = {
+    "sin": _sin,
+    "cos": _cos,
+    "tan": _tan,
+    "√": _sqrt,
+    "!": _factorial,
+    "%": _percent,
+}
+
+
+def _eval(node, x):
+    kind = node[0]
+    if kind == NUM:
+        return node[1]
+    if kind == "bin":
+        return BINARY_OPS[node[1]](_eval(node[2], x), _eval(node[3], x))
+    if kind == "call":
+        return FUNCTIONS[node[1]](_eval(node[2], x))
+    if kind == "neg":
+        return -_eval(node[1], x)
+    if kind in CALCULUS_KINDS:
+        # NumPy is only imported once an expression needs it
+        from . import calculus
+
+        return calculus.evaluate(kind, node[1], _eval(node[2], x), _eval(node[3], x))
+    if x is None:
+        raise CalcError("x has no value")
+    return x
+
+
+def has_variable(node):
+    kind = node[0]
+    if kind == "var":
+        return True
+    if kind == "bin":
+        return has_variable(node[2]) or has_variable(node[3])
+    if kind == NUM:
+        return False
+    if kind in CALCULUS_KINDS:
+        # the body's variable is bound, not the x of the expression
+        return has_variable(node[2]) or has_variable(node[3])
+    return has_variable(node[-1])
+
+
+def evaluate(node, x=None):
+    try:
+        result = _eval(node, x)
+    except CalcError:
+        raise
+    except (ArithmeticError, ValueError, TypeError, RecursionError) as e:
+        raise CalcError(str(e)) from e
+    if isinstance(result, float) and not math.isfinite(result):
+        raise CalcError("result is not finite")
+    return result
+
+
+def number(text):
+    # the float that a number, or an expression without x, stands for
+    try:
+        value = float(text)
+    except ValueError:
+        pass
+    else:
+        # float() also takes "nan", "inf" and "1e999"
+        if not math.isfinite(value):
+            raise CalcError(f"{text} is not a finite number")
+        return value
+    node = parse(text)
+    if has_variable(node):
+        raise CalcError(f"{text} is not a number")
+    try:
+        return float(evaluate(node))
+    except OverflowError:
+        raise CalcError("result too large") from None
+
+
+def calculate(text, x=None):
+    try:
+        return format_number(evaluate(parse(text), x))
+    except (CalcError, ValueError):
+        return "Error"
@@ -0,0 +1,152 @@
+"""Factorials for the calculator.
+
+Small n come from a precomputed table. Exact large factorials use
+Luschny's prime-swing recursion, n! = ((n//2)!)^2 * swing(n), where swing(n)
+is a product of prime powers multiplied as a balanced tree. Done on
+``decimal.Decimal`` the big multiplications go through libmpdec, which
+switches to a number-theoretic transform for huge operands and beats the
+Karatsuba multiplication behind ``math.factorial`` once n is in the tens of
+thousands; the result also converts to a digit string in linear time.
+``python -m calculator.benchmarks.bench_factorial`` shows the crossover.
+
+When only the size of n! matters, ``log10_factorial`` and
+``factorial_magnitude`` answer from the log-gamma function in constant
+time, and ``factorial_mod`` computes n! mod m without building n!.
+"""
+
+import decimal
+import math
+
+TABLE_SIZE = 256
+# from about here on factorial_decimal plus str() beats math.factorial plus
+# str(); it is also safely below CPython's 4300 digit str() limit
+DECIMAL_THRESHOLD = 1000
+
+_TABLE = [1] * TABLE_SIZE
+for _n in range(1, TABLE_SIZE):
+    _TABLE[_n] = _TABLE[_n - 1] * _n
+
+_EXACT_CONTEXT = decimal.Context(
+    prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+)
+
+
+def _check(n):
+    if n < 0:
+        raise ValueError("factorial of a negative number")
+
+
+def primes_up_to(n):
+    sieve = bytearray([1]) * (n + 1)
+    sieve[: min(2, n + 1)] = bytes(min(2, n + 1))
+    for i in range(2, math.isqrt(n) + 1):
+        if sieve[i]:
+            sieve[i * i :: i] = bytes(len(range(i * i, n + 1, i)))
+    return [i for i, is_prime in enumerate(sieve) if is_prime]
+
+
+def _swing_factors(n, primes):
+    # prime powers whose product is n! / ((n//2)!)^2
+    factors = []
+    root = math.isqrt(n)
+    half = n // 2
+    third = n // 3
+    for p in primes:
+        if p > n:
+            break
+        if p > root:
+            if p > half or (p <= third and (n // p) & 1):
+                factors.append(p)
+            continue
+        exponent = 0
+        q = n
+        while q:
+            q //= p
+            exponent += q & 1
+        if exponent:
+            factors.append(p**exponent)
+    return factors
+
+
+def _product(values):
+    # balanced product tree, so the big multiplications pair equal sizes
+    if not values:
+        return 1
+    while len(values) > 1:
+        pairs = iter(values)
+        merged = [a * b for a, b in zip(pairs, pairs)]
+        if len(values) & 1:
+            merged.append(values[-1])
+        values = merged
+    return values[0]
+
+
+def factorial(n):
+    _check(n)
+    if n < TABLE_SIZE:
+        return _TABLE[n]
+    return math.factorial(n)
+
+
+def factorial_decimal(n):
+    # exact n! as a Decimal
+    _check(n)
+    if n < TABLE_SIZE:
+        return decimal.Decimal(_TABLE[n])
+    primes = primes_up_to(n)
+    with decimal.localcontext(_EXACT_CONTEXT):
+
+        def swing_recursion(k):
+            if k < TABLE_SIZE:
+                return decimal.Decimal(_TABLE[k])
+            half = swing_recursion(k // 2)
+            swing = _product([decimal.Decimal(f) for f in _swing_factors(k, primes)])
+            return half * half * swing
+
+        return swing_recursion(n)
+
+
+def factorial_digits(n):
+    # the decimal digits of n!
+    if n < DECIMAL_THRESHOLD:
+        return str(factorial(n))
+    return str(factorial_decimal(n))
+
+
+def factorial_mod(n, m):
+    _check(n)
+    if m <= 0:
+        raise ValueError("modulus must be positive")
+    if m == 1 or n >= m:
+        # m itself is one of the factors
+        return 0
+    if n < TABLE_SIZE:
+        return _TABLE[n] % m
+    primes = primes_up_to(n)
+
+    def swing_recursion(k):
+        if k < TABLE_SIZE:
+            return _TABLE[k] % m
+        half = swing_recursion(k // 2)
+        result = half * half % m
+        for p in _swing_factors(k, primes):
+            result = result * p % m
+        return result
+
+    return swing_recursion(n)
+
+
+def log10_factorial(n):
+    # accurate for any n a float can hold
+    _check(n)
+    if n < TABLE_SIZE:
+        return math.log10(_TABLE[n])
+    return math.lgamma(n + 1) / math.log(10)
+
+
+def factorial_magnitude(n):
+    # n! as (mantissa, exponent) with 1 <= mantissa < 10; the mantissa has
+    # fewer correct digits as the exponent grows
+    log = log10_factorial(n)
+    exponent = math.floor(log)
+    return 10 ** (log - exponent), exponent
@@ -0,0 +1,72 @@
+"""The graph of y = f(x) that the buffer app shows under its display.
+
+``GraphView`` plots an expression in x over ``[x_min, x_max]`` from the
+points of ``plot.plot_points``, in segments cut at errors and poles. The
+y axis leaves out the highest and lowest 2% of the values, so a tan pole
+does not flatten the rest of the curve.
+"""
+
+import flet as ft
+import numpy as np
+
+from . import engine, plot
+
+
+class GraphView(ft.Container):
+    # about one point per horizontal pixel is all the client can show, so
+    # that is the budget sent over the websocket per redraw. show() and
+    # hide() leave the update() to the owning app.
+    def __init__(self, width=310, height=200, x_min=-10, x_max=10):
+        super().__init__()
+        self.x_min = x_min
+        self.x_max = x_max
+        self.point_budget = width
+        self.visible = False
+        self.chart = ft.LineChart(
+            width=width,
+            height=height,
+            min_x=x_min,
+            max_x=x_max,
+            border=ft.border.all(1, ft.colors.WHITE24),
+            horizontal_grid_lines=ft.ChartGridLines(color=ft.colors.WHITE10, width=1),
+            vertical_grid_lines=ft.ChartGridLines(color=ft.colors.WHITE10, width=1),
+        )
+        self.message = ft.Text(color=ft.colors.WHITE, size=12)
+        self.content = ft.Column(controls=[self.chart, self.message])
+
+    def show(self, expr):
+        try:
+            segments = plot.plot_points(expr, self.x_min, self.x_max, self.point_budget)
+        except engine.CalcError:
+            segments = []
+
+        self.visible = True
+        if not segments:
+            self.chart.data_series = []
+            self.message.value = "Error"
+            return
+
+        # keep tan-like spikes from flattening the rest of the curve
+        ys = np.concatenate([seg_ys for _, seg_ys in segments])
+        low, high = np.percentile(ys, (2, 98))
+        pad = (high - low) * 0.1 or 1.0
+        low, high = float(low - pad), float(high + pad)
+
+        self.chart.min_y = low
+        self.chart.max_y = high
+        self.chart.data_series = [
+            ft.LineChartData(
+                data_points=[
+                    ft.LineChartDataPoint(float(x), float(y))
+                    for x, y in zip(seg_xs, np.clip(seg_ys, low, high))
+                ],
+                color=ft.colors.ORANGE,
+                stroke_width=2,
+            )
+            for seg_xs, seg_ys in segments
+        ]
+        self.message.value = f"y = {expr}   x: {self.x_min} .. {self.x_max}"
+
+    def hide(self):
+        self.visible = False
+        self.chart.data_series = []
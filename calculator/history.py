@@ -0,0 +1,259 @@
+"""The history tape: what a session calculated, kept across visits.
+
+Every session has a ``HistoryTape`` of its last ``HISTORY_SIZE``
+calculations, ``(expression, result)`` pairs in a ring buffer, so a
+session holds no more than that however long it stays open.
+
+With ``CALC_HISTORY`` set to a file, the tapes of every session of the
+process are also kept in a SQLite database there (``shared_store``).
+``add`` only queues an entry; a thread writes what is queued in a single
+transaction every ``FLUSH_INTERVAL`` seconds, or as soon as
+``FLUSH_BATCH`` entries are waiting, and once more at exit. The queue is
+swapped out under a lock and written outside it, so ``add`` never waits
+for the disk. A write that fails is logged and its entries are kept for
+the next one, at most ``MAX_PENDING`` of them. The table is indexed by
+tape and expression, so the calculations that start with some text are a
+range of the index.
+
+A tape has an id; a browser keeps its tape's id in its client storage and
+the app attaches the session to it when it opens (see ``app``). What the
+session calculated before is moved onto that tape, not copied. Nothing is
+read from the database then: the tape's earlier entries are loaded the
+first time it is shown.
+"""
+
+import atexit
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from . import engine, metrics
+
+HISTORY_SIZE = 100
+FLUSH_INTERVAL = 2.0
+FLUSH_BATCH = 64
+# entries kept while the database cannot be written; the oldest go first
+MAX_PENDING = 10000
+# waiting for another process's transaction, in milliseconds
+BUSY_TIMEOUT = 5000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS history ("
+    " id INTEGER PRIMARY KEY,"
+    " tape TEXT NOT NULL,"
+    " expression TEXT NOT NULL,"
+    " result TEXT NOT NULL,"
+    " time REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS history_recent ON history (tape, id)",
+    "CREATE INDEX IF NOT EXISTS history_prefix ON history (tape, expression)",
+)
+
+logger = logging.getLogger("calculator.history")
+
+
+def prefix_end(prefix):
+    # the first text after every text that starts with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        # _lock guards the queue, _write_lock the connection
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        # (old tape, new tape) to rename after the entries are written
+        self._moves = []
+        self._wake = threading.Event()
+        self._connection = None
+        self._flusher = None
+
+    def _connect(self):
+        # under _write_lock; one connection for every thread, used in turn
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            connection.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT}")
+            # readers do not wait for writers, and a commit does not sync
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+        return self._connection
+
+    def _start_flusher(self):
+        # under _lock
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="history-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def add(self, tape, expression, result):
+        with self._lock:
+            self._pending.append((tape, expression, result, time.time()))
+            waiting = len(self._pending)
+            self._start_flusher()
+        if waiting >= FLUSH_BATCH:
+            self._wake.set()
+
+    def move(self, old, new):
+        # every entry of tape old, written or queued, onto tape new
+        with self._lock:
+            self._pending = [(new, *row[1:]) if row[0] == old else row for row in self._pending]
+            self._moves.append((old, new))
+            self._start_flusher()
+        self._wake.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # tried again at the next interval; the thread must live on,
+                # nothing would flush the queue otherwise
+                logger.exception("could not write the history to %s", self.path)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if not self._pending and not self._moves:
+                    return
+                rows, self._pending = self._pending, []
+                moves, self._moves = self._moves, []
+            started = metrics.start()
+            try:
+                connection = self._connect()
+                connection.execute("BEGIN")
+                try:
+                    connection.executemany(
+                        "INSERT INTO history (tape, expression, result, time)"
+                        " VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                    connection.executemany(
+                        "UPDATE history SET tape = ? WHERE tape = ?",
+                        [(new, old) for old, new in moves],
+                    )
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                # kept for the next flush, before what was queued since
+                with self._lock:
+                    self._pending[:0] = rows
+                    del self._pending[:-MAX_PENDING]
+                    self._moves[:0] = moves
+                raise
+            metrics.count("calc_history_flushes_total")
+            metrics.observe("calc_history_flush_seconds", started)
+
+    def _query(self, sql, parameters):
+        try:
+            # what is still queued is written first, so that it is found
+            self.flush()
+            with self._write_lock:
+                return self._connect().execute(sql, parameters).fetchall()
+        except sqlite3.Error as error:
+            raise engine.CalcError(f"history: {error}") from None
+
+    def recent(self, tape, limit):
+        # the last limit entries of a tape, oldest first
+        rows = self._query(
+            "SELECT expression, result FROM history WHERE tape = ? ORDER BY id DESC LIMIT ?",
+            (tape, limit),
+        )
+        rows.reverse()
+        return rows
+
+    def search(self, tape, prefix, limit):
+        # the last limit entries of a tape whose expression starts with
+        # prefix, newest first
+        return self._query(
+            "SELECT expression, result FROM history"
+            " WHERE tape = ? AND expression >= ? AND expression < ?"
+            " ORDER BY id DESC LIMIT ?",
+            (tape, prefix, prefix_end(prefix), limit),
+        )
+
+    def close(self):
+        try:
+            self.flush()
+        except sqlite3.Error as error:
+            logger.warning("could not write the history to %s: %s", self.path, error)
+        with self._write_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class HistoryTape:
+    __slots__ = ("tape_id", "store", "entries", "loaded")
+
+    def __init__(self, store=None):
+        self.store = store
+        self.tape_id = secrets.token_hex(8)
+        self.entries = deque(maxlen=HISTORY_SIZE)
+        # whether the entries the store has from earlier sessions are in
+        # entries
+        self.loaded = True
+
+    def attach(self, tape_id):
+        # the tape this browser had before, loaded when it is first shown
+        if self.store is None or tape_id == self.tape_id:
+            return
+        # what was calculated before the id arrived goes on that tape too
+        self.store.move(self.tape_id, tape_id)
+        self.tape_id = tape_id
+        self.loaded = False
+
+    def add(self, expression, result):
+        self.entries.append((expression, result))
+        if self.store is not None:
+            self.store.add(self.tape_id, expression, result)
+
+    def load(self):
+        if self.loaded:
+            return
+        # the store has this session's entries as well; if it cannot be
+        # read, they stay and it is tried again next time
+        entries = self.store.recent(self.tape_id, HISTORY_SIZE)
+        self.entries.clear()
+        self.entries.extend(entries)
+        self.loaded = True
+
+    def recent(self, limit):
+        # newest first
+        self.load()
+        return [self.entries[-i] for i in range(1, min(limit, len(self.entries)) + 1)]
+
+    def search(self, prefix, limit):
+        # newest first
+        if self.store is None:
+            found = [entry for entry in reversed(self.entries) if entry[0].startswith(prefix)]
+            return found[:limit]
+        self.load()
+        return [tuple(row) for row in self.store.search(self.tape_id, prefix, limit)]
+
+
+def _open_store():
+    # None unless CALC_HISTORY is set
+    path = os.getenv("CALC_HISTORY")
+    if not path:
+        return None
+    store = HistoryStore(path)
+    atexit.register(store.close)
+    return store
+
+
+shared_store = _open_store()
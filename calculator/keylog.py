@@ -0,0 +1,88 @@
+"""Recording the keys of a session, and replaying them without a page.
+
+With ``CALC_RECORD`` set to a directory, every session of the keypad and
+the string-buffer apps writes the keys it is sent to a file of its own
+there, ``<app>-<time>-<id>.keys``. It is a text file with a header line
+and then one line per display update: the keys pressed, separated by
+spaces (a burst of keyboard keys is pressed together), a tab and what the
+display showed after them::
+
+    # calculator keylog 1 keypad
+    1	1
+    2	12
+    +	12
+    3 4 =	46
+
+``replay`` presses the keys of a log on a new ``CalculatorApp`` that is
+not on a page, as fast as it can evaluate them, and compares its display
+with the log's line by line. A directory of logs recorded in production is
+a regression and performance corpus for both apps, see
+``benchmarks/bench_replay``.
+"""
+
+import importlib
+import os
+import secrets
+import time
+
+HEADER = "# calculator keylog 1"
+# app name in a log -> module with its CalculatorApp
+APPS = {
+    "keypad": "calculator.app",
+    "buffer": "calculator.buffer_app",
+}
+
+
+class KeyLog:
+    __slots__ = ("path",)
+
+    def __init__(self, path, app):
+        self.path = path
+        with open(path, "x", encoding="utf-8") as f:
+            f.write(f"{HEADER} {app}\n")
+
+    def record(self, keys, display):
+        # a line at a time, so a session that ends without notice has
+        # written all of it
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{' '.join(keys)}\t{display}\n")
+
+
+def open_log(app):
+    # None unless recording is switched on
+    directory = os.getenv("CALC_RECORD")
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    name = f"{app}-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}.keys"
+    return KeyLog(os.path.join(directory, name), app)
+
+
+def read(path):
+    # (app, [(keys, display)])
+    with open(path, encoding="utf-8") as f:
+        header = f.readline().rstrip("\n")
+        if not header.startswith(HEADER + " "):
+            raise ValueError(f"{path}: not a calculator keylog")
+        app = header[len(HEADER) + 1:]
+        if app not in APPS:
+            raise ValueError(f"{path}: unknown app {app!r}")
+        lines = []
+        for number, line in enumerate(f, 2):
+            keys, tab, display = line.rstrip("\n").partition("\t")
+            if not tab or not keys:
+                raise ValueError(f"{path}:{number}: expected keys, a tab and the display")
+            lines.append((keys.split(" "), display))
+    return app, lines
+
+
+def replay(app, lines):
+    # the first (line index, expected, shown) that differs, or None
+    calc = importlib.import_module(APPS[app]).CalculatorApp()
+    calc.keylog = None
+    for index, (keys, display) in enumerate(lines):
+        for data in keys:
+            calc.press_key(data, [])
+        if calc.result.value != display:
+            return index, display, calc.result.value
+    return None
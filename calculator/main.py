@@ -5,4 +5,5 @@ def main(page: ft.Page):
     page.add(ft.SafeArea(ft.Text("Hello, Flet!")))
 
 
-ft.app(main)
+if __name__ == "__main__":
+    ft.app(main)
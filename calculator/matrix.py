@@ -0,0 +1,209 @@
+"""Matrices: reading what the user types or pastes, and operating on them.
+
+``parse`` reads a matrix as rows separated by newlines or ";" and entries
+separated by spaces, tabs or ",", so ``1 2; 3 4``, a block pasted from a
+spreadsheet, CSV lines and ``[[1, 2], [3, 4]]`` all work. An entry that
+is not a plain number is evaluated as an expression, e.g. ``√2`` or
+``π/4``, and may not contain spaces or commas. ``random 500``,
+``identity 3`` or ``random 200x300`` make a matrix of that size, and
+``ans`` is the last result.
+
+The operations are NumPy's, which hands them to LAPACK and a BLAS that
+uses every core. One runs at a time in a process, since more would only
+share the same cores, and they run in the session's thread, not in the
+forked workers of ``worker``. ``apply`` evaluates an expression in x for
+every entry with the calculator's own functions (see ``vector``), so trig
+is in degrees and an entry that would be "Error" is NaN.
+
+Every error is an ``engine.CalcError``.
+"""
+
+import re
+import threading
+
+import numpy as np
+
+from . import engine, metrics, vector
+
+# rows and columns of a matrix
+MAX_SIZE = 2000
+# significant digits of an entry as shown
+SHOWN_DIGITS = 6
+
+_ROWS_RE = re.compile(r"\]\s*,?\s*\[|[;\n]")
+_ENTRIES_RE = re.compile(r"[\s,]+")
+_MADE_RE = re.compile(r"(random|identity|zeros|ones)\s+(\d+)(?:\s*[x×]\s*(\d+))?")
+
+_lock = threading.Lock()
+
+
+def _check_size(rows, columns):
+    if rows > MAX_SIZE or columns > MAX_SIZE:
+        raise engine.CalcError(f"at most {MAX_SIZE} rows and columns")
+
+
+def make(kind, rows, columns):
+    _check_size(rows, columns)
+    if kind == "random":
+        return np.random.default_rng().random((rows, columns))
+    if kind == "identity":
+        return np.eye(rows, columns)
+    if kind == "zeros":
+        return np.zeros((rows, columns))
+    return np.ones((rows, columns))
+
+
+def parse(text, answer=None):
+    text = text.strip()
+    if text == "ans":
+        if answer is None:
+            raise engine.CalcError("no result yet")
+        return answer
+    made = _MADE_RE.fullmatch(text)
+    if made:
+        rows = int(made[2])
+        return make(made[1], rows, int(made[3] or rows))
+    rows = []
+    for line in _ROWS_RE.split(text.strip("[]")):
+        line = line.strip(" \t,[]")
+        if line:
+            rows.append(_ENTRIES_RE.split(line))
+    if not rows:
+        raise engine.CalcError("no matrix")
+    columns = len(rows[0])
+    if any(len(row) != columns for row in rows):
+        raise engine.CalcError("every row needs the same number of entries")
+    _check_size(len(rows), columns)
+    try:
+        # plain numbers, as pasted, in one conversion
+        values = np.array(rows, dtype=float)
+    except ValueError:
+        return np.array([[engine.number(entry) for entry in row] for row in rows])
+    if not np.isfinite(values).all():
+        # "nan", "inf" or "1e999": engine.number says which
+        for row in rows:
+            for entry in row:
+                engine.number(entry)
+    return values
+
+
+def _square(a):
+    if a.shape[0] != a.shape[1]:
+        raise engine.CalcError("the matrix is not square")
+
+
+def _finite(*matrices):
+    if not all(np.isfinite(m).all() for m in matrices):
+        raise engine.CalcError("the matrix has Error entries")
+
+
+def multiply(a, b):
+    if a.shape[1] != b.shape[0]:
+        raise engine.CalcError("A needs as many columns as B has rows")
+    return a @ b
+
+
+def add(a, b):
+    if a.shape != b.shape:
+        raise engine.CalcError("A and B are not the same size")
+    return a + b
+
+
+def subtract(a, b):
+    if a.shape != b.shape:
+        raise engine.CalcError("A and B are not the same size")
+    return a - b
+
+
+def transpose(a):
+    # a copy, so the page shown does not stride across the whole matrix
+    return np.ascontiguousarray(a.T)
+
+
+def inverse(a):
+    _square(a)
+    _finite(a)
+    return np.linalg.inv(a)
+
+
+def determinant(a):
+    _square(a)
+    _finite(a)
+    with np.errstate(all="ignore"):
+        value = float(np.linalg.det(a))
+    if not np.isfinite(value):
+        raise engine.CalcError("result too large")
+    return value
+
+
+def solve(a, b):
+    # X with A X = B
+    _square(a)
+    if b.shape[0] != a.shape[0]:
+        raise engine.CalcError("B needs as many rows as A")
+    _finite(a, b)
+    return np.linalg.solve(a, b)
+
+
+def eigenvalues(a):
+    # a column, in order; real for a symmetric matrix, possibly complex
+    # otherwise
+    _square(a)
+    _finite(a)
+    if np.array_equal(a, a.T):
+        values = np.linalg.eigvalsh(a)
+    else:
+        values = np.sort(np.linalg.eigvals(a))
+        if not values.imag.any():
+            values = values.real
+    return values[:, None]
+
+
+def _real(*matrices):
+    if any(np.iscomplexobj(m) for m in matrices):
+        raise engine.CalcError("complex matrices are not supported")
+
+
+def apply(expression, a):
+    # the expression in x evaluated for every entry
+    _real(a)
+    return vector.evaluate_many(expression, a)
+
+
+# key -> (operation, whether it takes B as well)
+OPERATIONS = {
+    "A×B": (multiply, True),
+    "A+B": (add, True),
+    "A−B": (subtract, True),
+    "Aᵀ": (transpose, False),
+    "A⁻¹": (inverse, False),
+    "det A": (determinant, False),
+    "solve AX=B": (solve, True),
+    "eig A": (eigenvalues, False),
+}
+
+
+def run(name, *operands):
+    operation, _ = OPERATIONS[name]
+    _real(*operands)
+    with _lock:
+        started = metrics.start()
+        try:
+            result = operation(*operands)
+        except np.linalg.LinAlgError as error:
+            if "singular" in str(error).lower():
+                raise engine.CalcError("the matrix is singular") from None
+            raise engine.CalcError(str(error)) from None
+        finally:
+            metrics.count("calc_matrix_operations_total", "operation", name)
+            metrics.observe("calc_matrix_seconds", started)
+    return result
+
+
+def format_entry(value):
+    if isinstance(value, complex) and value.imag:
+        return f"{value.real + 0.0:.{SHOWN_DIGITS - 2}g}{value.imag:+.{SHOWN_DIGITS - 2}g}i"
+    value = float(value.real) + 0.0
+    if not np.isfinite(value):
+        return "Error"
+    return f"{value:.{SHOWN_DIGITS}g}"
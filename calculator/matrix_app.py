@@ -0,0 +1,146 @@
+"""The matrix calculator.
+
+A and B are typed or pasted as text (see ``matrix.parse``) and the keys
+operate on them; ``f(A)`` evaluates the expression in x of the f field for
+every entry of A. A result is shown a page at a time (see
+``matrix_view``), and ``ans`` in A or B goes on with it. Start it with
+``python -m calculator --app matrix``.
+"""
+
+import flet as ft
+import numpy as np
+
+from . import engine, matrix
+from .matrix_view import MatrixView
+
+KEY_ROWS = (
+    ("A×B", "A+B", "A−B", "Aᵀ"),
+    ("A⁻¹", "det A", "solve AX=B", "eig A"),
+)
+
+
+class ActionButton(ft.ElevatedButton):
+    def __init__(self, text, on_click):
+        super().__init__(text=text, on_click=on_click, expand=1)
+        self.bgcolor = ft.colors.ORANGE
+        self.color = ft.colors.WHITE
+
+
+class ExtraActionButton(ft.ElevatedButton):
+    def __init__(self, text, on_click):
+        super().__init__(text=text, on_click=on_click, expand=1)
+        self.bgcolor = ft.colors.BLUE_GREY_100
+        self.color = ft.colors.BLACK
+
+
+def matrix_field(label, value):
+    return ft.TextField(
+        label=label,
+        value=value,
+        multiline=True,
+        min_lines=1,
+        max_lines=6,
+        dense=True,
+        color=ft.colors.WHITE,
+        text_style=ft.TextStyle(font_family="monospace"),
+    )
+
+
+class MatrixApp(ft.Container):
+    def __init__(self):
+        super().__init__()
+        self.a = matrix_field("A", "1 2; 3 4")
+        self.b = matrix_field("B", "5; 6")
+        self.function = ft.TextField(
+            label="f(x)", value="x^2", dense=True, color=ft.colors.WHITE, expand=True
+        )
+        self.status = ft.Text(color=ft.colors.WHITE, size=14, selectable=True)
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        self.view = MatrixView()
+        self.answer = None
+        # label -> (text, matrix) last read, so that a long paste or a
+        # random matrix is read once rather than at every key
+        self.parsed = {}
+        self.busy = False
+        button_clicked = self.button_clicked
+
+        self.width = 560
+        self.bgcolor = ft.colors.BLACK
+        self.border_radius = ft.border_radius.all(20)
+        self.padding = 20
+        self.content = ft.Column(
+            controls=[
+                self.a,
+                self.b,
+                *(
+                    ft.Row(
+                        controls=[ActionButton(text=key, on_click=button_clicked) for key in keys]
+                    )
+                    for keys in KEY_ROWS
+                ),
+                ft.Row(
+                    controls=[
+                        self.function,
+                        ExtraActionButton(text="f(A)", on_click=button_clicked),
+                    ]
+                ),
+                ft.Row(controls=[self.progress, self.status]),
+                self.view,
+            ]
+        )
+
+    def button_clicked(self, e):
+        # one operation at a time; a large one takes seconds
+        if self.busy:
+            return
+        self.busy = True
+        self.progress.visible = True
+        self.progress.update()
+        try:
+            self.show_result(e.control.text, self.calculate(e.control.text))
+        except engine.CalcError as error:
+            self.status.value = f"Error: {error}"
+            self.view.hide()
+        finally:
+            self.busy = False
+            self.progress.visible = False
+        self.page.update(self.progress, self.status, self.view)
+
+    def read(self, field):
+        text = field.value or ""
+        last = self.parsed.get(field.label)
+        if last is not None and last[0] == text and text.strip() != "ans":
+            return last[1]
+        value = matrix.parse(text, self.answer)
+        self.parsed[field.label] = (text, value)
+        return value
+
+    def calculate(self, key):
+        a = self.read(self.a)
+        if key == "f(A)":
+            return matrix.apply(self.function.value or "x", a)
+        _, takes_b = matrix.OPERATIONS[key]
+        if takes_b:
+            return matrix.run(key, a, self.read(self.b))
+        return matrix.run(key, a)
+
+    def show_result(self, key, result):
+        if np.ndim(result) == 0:
+            self.answer = np.array([[result]])
+            self.status.value = f"{key} = {engine.format_number(result)}"
+            self.view.hide()
+            return
+        self.answer = result
+        rows, columns = result.shape
+        self.status.value = f"{key}: {rows}×{columns}"
+        if not np.iscomplexobj(result):
+            errors = np.count_nonzero(~np.isfinite(result))
+            if errors:
+                self.status.value += f", {errors} Error"
+        self.view.show(result)
+
+
+def main(page: ft.Page):
+    page.title = "Calc App"
+    page.scroll = ft.ScrollMode.AUTO
+    page.add(MatrixApp())
@@ -0,0 +1,86 @@
+"""A matrix of any size shown a page at a time, for the matrix calculator.
+
+``MatrixView`` shows ``PAGE_ROWS`` × ``PAGE_COLUMNS`` entries, formatted
+by ``matrix.format_entry``, with arrows that move the page across the
+matrix.
+"""
+
+import flet as ft
+
+from . import matrix
+
+PAGE_ROWS = 10
+PAGE_COLUMNS = 5
+# characters of an entry's column
+ENTRY_WIDTH = 12
+
+
+class MatrixView(ft.Container):
+    # a page of PAGE_ROWS × PAGE_COLUMNS entries of a matrix of any size:
+    # one Text per row of the page and the arrows to move the page, so a
+    # 2000×2000 result sends as many controls as a 2×2 one and only the
+    # entries shown are formatted. show() and hide() leave the update() to
+    # the owning app.
+    def __init__(self):
+        super().__init__()
+        self.visible = False
+        self.matrix = None
+        self.first_row = 0
+        self.first_column = 0
+        self.position = ft.Text(color=ft.colors.WHITE54, size=12, expand=True)
+        self.lines = [
+            ft.Text(color=ft.colors.WHITE, size=12, font_family="monospace", no_wrap=True)
+            for _ in range(PAGE_ROWS)
+        ]
+        self.arrows = {
+            # text -> (rows, columns) it moves the page by
+            "◀": (0, -PAGE_COLUMNS),
+            "▶": (0, PAGE_COLUMNS),
+            "▲": (-PAGE_ROWS, 0),
+            "▼": (PAGE_ROWS, 0),
+        }
+        self.buttons = [
+            ft.TextButton(text=text, on_click=self.move, data=text, disabled=True)
+            for text in self.arrows
+        ]
+        self.content = ft.Column(
+            controls=[ft.Row(controls=[self.position, *self.buttons]), *self.lines],
+            spacing=2,
+        )
+
+    def show(self, values):
+        self.matrix = values
+        self.first_row = 0
+        self.first_column = 0
+        self.visible = True
+        self.render()
+
+    def hide(self):
+        self.matrix = None
+        self.visible = False
+
+    def render(self):
+        rows, columns = self.matrix.shape
+        top, left = self.first_row, self.first_column
+        page = self.matrix[top : top + PAGE_ROWS, left : left + PAGE_COLUMNS]
+        for i, line in enumerate(self.lines):
+            line.visible = i < len(page)
+            if line.visible:
+                entries = "".join(matrix.format_entry(v).rjust(ENTRY_WIDTH) for v in page[i])
+                line.value = f"{top + i + 1:>4} │{entries}"
+        self.position.value = (
+            f"{rows}×{columns}, rows {top + 1}–{top + len(page)},"
+            f" columns {left + 1}–{left + page.shape[1]}"
+        )
+        for button in self.buttons:
+            down, across = self.arrows[button.data]
+            button.disabled = not (0 <= top + down < rows and 0 <= left + across < columns)
+
+    def move(self, e):
+        if self.matrix is None:
+            return
+        down, across = self.arrows[e.control.data]
+        self.first_row += down
+        self.first_column += across
+        self.render()
+        self.update()
@@ -0,0 +1,174 @@
+"""Counters, latency histograms and sampled event logs.
+
+Everything is kept in process memory and rendered in the Prometheus text
+format by ``render`` (served at ``/metrics``, see ``api``). Set
+``CALC_METRICS=0`` to switch it off: ``count``, ``start``, ``observe`` and
+``event`` are then functions that do nothing, so instrumented code pays a
+call and nothing else.
+
+Every process counts for itself; ``merge`` adds up what several of them
+rendered (see ``cluster``).
+
+Event logs are JSON lines on the ``calculator.events`` logger (stderr
+unless it is configured otherwise) for a random sample of events,
+``CALC_EVENT_SAMPLE`` of them (0 to 1, default 0: none).
+"""
+
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+# seconds, for both evaluate and update
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+HELP = {
+    "calc_keys_total": "Keys pressed, by key.",
+    "calc_evaluations_total": "Evaluations, by path.",
+    "calc_errors_total": "Evaluations that ended in Error.",
+    "calc_api_expressions_total": "Expressions evaluated by /api/eval.",
+    "calc_evaluate_seconds": "Time to evaluate a key's expression.",
+    "calc_update_seconds": "Time to send a key's display update.",
+    "calc_cache_entries": "Expressions in the shared cache.",
+    "calc_cache_hits_total": "Shared cache lookups that found the expression.",
+    "calc_cache_misses_total": "Shared cache lookups that parsed the expression.",
+    "calc_cache_evictions_total": "Expressions dropped from the shared cache.",
+    "calc_workers_killed_total": "Worker processes killed on timeout or cancel.",
+    "calc_history_flushes_total": "Transactions that wrote queued history entries.",
+    "calc_history_flush_seconds": "Time to write the queued history entries.",
+    "calc_matrix_operations_total": "Matrix operations, by operation.",
+    "calc_matrix_seconds": "Time of a matrix operation.",
+}
+
+_lock = threading.Lock()
+# (name, label name, label value) -> count
+_counters = {}
+# name -> [counts per bucket and +Inf, sum]
+_histograms = {}
+# () -> [(name, type, value)] of values read at scrape time
+_collectors = []
+
+logger = logging.getLogger("calculator.events")
+
+
+def _count(name, label=None, value=None):
+    key = (name, label, value)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + 1
+
+
+def _start():
+    return time.perf_counter()
+
+
+def _observe(name, started):
+    seconds = time.perf_counter() - started
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = [[0] * (len(BUCKETS) + 1), 0.0]
+        histogram[0][index] += 1
+        histogram[1] += seconds
+
+
+def _event(kind, **fields):
+    if random.random() < event_sample:
+        logger.info(json.dumps({"event": kind, "time": time.time(), **fields}, ensure_ascii=False))
+
+
+def _nothing(*args, **fields):
+    return 0.0
+
+
+enabled = os.getenv("CALC_METRICS", "1") != "0"
+event_sample = float(os.getenv("CALC_EVENT_SAMPLE") or 0)
+
+count = _count if enabled else _nothing
+start = _start if enabled else _nothing
+observe = _observe if enabled else _nothing
+event = _event if enabled and event_sample > 0 else _nothing
+
+if event is _event and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def collect(collector):
+    # collector() returns [(name, type, value)], read on every scrape
+    _collectors.append(collector)
+
+
+def _help(lines, name, kind):
+    if name in HELP:
+        lines.append(f"# HELP {name} {HELP[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _label(label, value):
+    if label is None:
+        return ""
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{{{label}="{value}"}}'
+
+
+def render():
+    with _lock:
+        counters = sorted(_counters.items(), key=lambda item: (item[0][0], str(item[0][2])))
+        histograms = {name: (list(counts), total) for name, (counts, total) in _histograms.items()}
+    lines = []
+    last = None
+    for (name, label, value), n in counters:
+        if name != last:
+            _help(lines, name, "counter")
+            last = name
+        lines.append(f"{name}{_label(label, value)} {n}")
+    for name in sorted(histograms):
+        counts, total = histograms[name]
+        _help(lines, name, "histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum {total}")
+        lines.append(f"{name}_count {cumulative}")
+    for collector in _collectors:
+        for name, kind, value in collector():
+            _help(lines, name, kind)
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def merge(texts):
+    # the sum of several processes' render(), series by series; each
+    # family's samples stay together after its HELP and TYPE lines
+    families = {}
+    for text in texts:
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# "):
+                family = families.setdefault(line.split()[2], ({}, {}))
+                family[0][line] = None
+            elif line:
+                series, _, value = line.rpartition(" ")
+                samples = family[1]
+                samples[series] = samples.get(series, 0) + _number(value)
+    lines = []
+    for comments, samples in families.values():
+        lines += comments
+        lines += [f"{series} {value}" for series, value in samples.items()]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,134 @@
+"""Sampling of y = f(x) for the graph view, without Flet.
+
+``adaptive_sample`` starts from a coarse uniform grid and keeps splitting
+the intervals where the curve bends (the midpoint is far from the chord)
+or where it runs into an error such as a tan pole, evaluating each round's
+new midpoints in one vectorized call. ``split_segments`` cuts the result at
+errors and poles so no line is drawn across them, and ``lttb`` reduces each
+segment to a pixel-sized budget before anything is sent to the client.
+"""
+
+import numpy as np
+
+from . import engine, vector
+
+
+def _y_scale(ys):
+    finite = ys[np.isfinite(ys)]
+    if finite.size == 0:
+        return 1.0
+    low, high = np.percentile(finite, (5, 95))
+    return float(high - low) or max(float(np.abs(finite).max()), 1.0)
+
+
+def adaptive_sample(
+    expr, x_min, x_max, initial=257, max_points=8192, rounds=12, tolerance=2e-3
+):
+    node = engine.parse(expr) if isinstance(expr, str) else expr
+    xs = np.linspace(x_min, x_max, initial)
+    ys = vector.evaluate_many(node, xs)
+    scale = _y_scale(ys)
+    # intervals that still have to be checked
+    active = np.flatnonzero(np.ones(len(xs) - 1, dtype=bool))
+
+    for _ in range(rounds):
+        room = max_points - len(xs)
+        if active.size == 0 or room <= 0:
+            break
+        mid_xs = (xs[active] + xs[active + 1]) / 2
+        mid_ys = vector.evaluate_many(node, mid_xs)
+        left, right = ys[active], ys[active + 1]
+
+        with np.errstate(invalid="ignore"):
+            deviation = np.abs(mid_ys - (left + right) / 2) / scale
+        nans = (
+            np.isnan(left).astype(int) + np.isnan(right) + np.isnan(mid_ys)
+        )
+        # an interval with an error at one end but not the other is split so
+        # the edge of the valid region is found
+        deviation[(nans > 0) & (nans < 3)] = np.inf
+        deviation[np.isnan(deviation)] = 0
+        split = np.flatnonzero(deviation > tolerance)
+        if split.size == 0:
+            break
+        if split.size > room:
+            split = split[np.argsort(deviation[split])[::-1][:room]]
+            split.sort()
+
+        positions = active[split] + 1
+        xs = np.insert(xs, positions, mid_xs[split])
+        ys = np.insert(ys, positions, mid_ys[split])
+        # both halves of every split interval are checked next round
+        left_halves = active[split] + np.arange(split.size)
+        active = np.sort(np.concatenate((left_halves, left_halves + 1)))
+
+    return xs, ys
+
+
+def split_segments(xs, ys, jump=4.0):
+    # break at errors, and where y jumps across zero by more than `jump`
+    # times the typical y range (a pole)
+    scale = _y_scale(ys)
+    valid = np.isfinite(ys)
+    breaks = np.zeros(len(ys) + 1, dtype=bool)
+    breaks[0] = breaks[-1] = True
+    with np.errstate(invalid="ignore"):
+        dy = np.abs(np.diff(ys))
+        sign_flip = np.sign(ys[:-1]) != np.sign(ys[1:])
+    breaks[1:-1] = (dy > jump * scale) & sign_flip
+
+    segments = []
+    start = 0
+    for end in np.flatnonzero(breaks[1:]) + 1:
+        seg_valid = valid[start:end]
+        # an error in the middle also splits the run
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], seg_valid, [0])).astype(int)))
+        for a, b in zip(edges[::2], edges[1::2]):
+            segments.append((xs[start + a:start + b], ys[start + a:start + b]))
+        start = end
+    return segments
+
+
+def lttb(xs, ys, threshold):
+    # Largest-Triangle-Three-Buckets: keep the first and last point and,
+    # from each bucket in between, the point that spans the largest
+    # triangle with the previously kept point and the next bucket's mean
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        if threshold < 3 and n > 2:
+            return xs[[0, -1]], ys[[0, -1]]
+        return xs, ys
+
+    bounds = np.linspace(1, n - 1, threshold - 1).astype(int)
+    out_x = np.empty(threshold)
+    out_y = np.empty(threshold)
+    out_x[0], out_y[0] = xs[0], ys[0]
+    a_x, a_y = xs[0], ys[0]
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        if i + 2 < len(bounds):
+            next_start, next_end = bounds[i + 1], bounds[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        c_x = xs[next_start:next_end].mean()
+        c_y = ys[next_start:next_end].mean()
+        bx = xs[start:end]
+        by = ys[start:end]
+        area = np.abs((a_x - c_x) * (by - a_y) - (a_x - bx) * (c_y - a_y))
+        k = int(area.argmax())
+        a_x, a_y = bx[k], by[k]
+        out_x[i + 1], out_y[i + 1] = a_x, a_y
+    out_x[-1], out_y[-1] = xs[-1], ys[-1]
+    return out_x, out_y
+
+
+def plot_points(expr, x_min, x_max, budget):
+    # a list of (xs, ys) segments holding about `budget` points in total
+    xs, ys = adaptive_sample(expr, x_min, x_max, max_points=max(budget * 16, 1024))
+    segments = split_segments(xs, ys)
+    total = sum(len(seg_xs) for seg_xs, _ in segments) or 1
+    reduced = []
+    for seg_xs, seg_ys in segments:
+        share = max(int(budget * len(seg_xs) / total), 2)
+        reduced.append(lttb(seg_xs, seg_ys, share))
+    return reduced
@@ -0,0 +1,495 @@
+"""Decimal and exact rational evaluation for the calculator's precision modes.
+
+The engine computes on binary floats, so ``0.1+0.2`` shows
+``0.30000000000000004``. A session can pick another mode instead:
+
+- ``"decimal"`` runs the same operations on ``decimal.Decimal`` with
+  ``GUARD_DIGITS`` more digits than the configurable precision, then rounds
+  the result to that many significant digits. Only non-integer factorials
+  are limited to float accuracy.
+- ``"fraction"`` keeps exact rationals with ``fractions.Fraction``. √, the
+  trig functions and non-integer powers and factorials have no rational
+  result in general and fall back to floats. √ of a perfect square and the
+  trig functions at multiples of 30° and 45° stay exact.
+- ``"float"`` is the engine itself.
+
+Literals have to be parsed for the mode (``parse``) so no digits are lost.
+
+``evaluate_text`` first asks the shared expression cache for the float
+value, which is usually already there. An int is exact in every mode. A
+float is kept in decimal mode when the expression cannot cancel (no
+subtraction, negation, x or trig functions). In that case a static bound on
+its relative error is known, and if both ends of the bound round to the same
+digits, those digits are the answer. That works up to about
+``FLOAT_DIGITS`` significant digits.
+``python -m calculator.benchmarks.bench_precision`` shows the cost per
+operation of each mode.
+"""
+
+import decimal
+import functools
+import math
+import operator
+from decimal import Decimal
+from fractions import Fraction
+
+from . import engine
+from .cache import shared_cache
+from .display import format_number
+from .engine import NUM, CalcError
+
+MODES = ("float", "decimal", "fraction")
+DEFAULT_PRECISION = 28
+GUARD_DIGITS = 5
+# the float fast path can only prove results up to about this many digits
+FLOAT_DIGITS = 16
+
+NUMBER_TYPES = {"float": float, "decimal": Decimal, "fraction": Fraction}
+
+_UNIT = 2.0**-53
+_EXACT_INT = 2**53
+
+
+@functools.lru_cache(maxsize=32)
+def _context(precision):
+    return decimal.Context(prec=precision)
+
+
+def parse(text, mode="decimal"):
+    return engine.parse(text, NUMBER_TYPES[mode])
+
+
+# --- fast path: the cached float value with a static error bound ---
+
+
+@functools.lru_cache(maxsize=1024)
+def _error_bound(node):
+    # bound on the relative error of the float evaluation, or None when it
+    # cannot be bounded without looking at values: subtraction, negation
+    # and x may cancel, and trig functions lose all relative accuracy near
+    # their zeros. Every operation may round once and convert an int once.
+    kind = node[0]
+    if kind == NUM:
+        value = node[1]
+        if value < 0:
+            return None
+        if value is not math.pi and value == int(value) and value <= _EXACT_INT:
+            return 0.0
+        return _UNIT
+    if kind == "bin":
+        op = node[1]
+        a = _error_bound(node[2])
+        if a is None or op == "-":
+            return None
+        if op == "^":
+            exponent = node[3]
+            if exponent[0] != NUM or not isinstance(exponent[1], int):
+                return None
+            return exponent[1] * a * 1.01 + 3 * _UNIT
+        b = _error_bound(node[3])
+        if b is None:
+            return None
+        if op == "+":
+            # no cancellation between values that are all positive
+            return max(a, b) + 2 * _UNIT
+        return (a + b) * 1.01 + 2 * _UNIT
+    if kind == "call":
+        name = node[1]
+        if name == "!":
+            argument = node[2]
+            return 2 * _UNIT if argument[0] == NUM and isinstance(argument[1], int) else None
+        if name not in ("√", "%"):
+            return None
+        a = _error_bound(node[2])
+        if a is None:
+            return None
+        return a + 2 * _UNIT
+    return None
+
+
+def _round_bound(value, error, context):
+    # `value` rounded to the context's digits if every number within the
+    # relative error bound rounds the same way, else None
+    magnitude = abs(value)
+    if not magnitude:
+        # an exact 0 or one that underflowed: the exact types tell them apart
+        return None
+    digits = context.prec
+    shift = digits - 1 - math.floor(math.log10(magnitude))
+    if abs(shift) > 300:
+        return None
+    # scale to `digits` digits before the point and round both ends of the
+    # bound, widened for the rounding of this arithmetic itself
+    scaled = magnitude * 10.0**shift
+    spread = scaled * (error + 6 * _UNIT)
+    low = round(scaled - spread)
+    if low != round(scaled + spread) or not 10 ** (digits - 1) <= low < 10**digits:
+        return None
+    result = Decimal(low).scaleb(-shift, context)
+    return result.copy_negate() if value < 0 else result
+
+
+def _fast_path(text, mode, context):
+    # the exact-mode result from the expression cache's float value, or None
+    entry = shared_cache.get(text)
+    if entry.compiled is None:
+        raise CalcError(f"cannot parse {text!r}")
+    value = entry.value
+    if value is None:
+        # an error, x or a worker expression: leave it to the exact types
+        return None
+    if isinstance(value, int):
+        # the engine only keeps ints when they are exact
+        return value if mode == "fraction" else context.create_decimal(value)
+    if mode == "fraction" or context.prec > FLOAT_DIGITS:
+        return None
+    error = _error_bound(entry.compiled.node)
+    if error is None:
+        return None
+    return _round_bound(value, error, context)
+
+
+# --- decimal mode ---
+
+
+@functools.lru_cache(maxsize=32)
+def _pi(precision):
+    # the series from the decimal module's documentation
+    with decimal.localcontext(_context(precision + 3)):
+        three = Decimal(3)
+        last, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != last:
+            last = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return _context(precision).plus(s)
+
+
+def _to_decimal(value, context):
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, Fraction):
+        return context.divide(Decimal(value.numerator), Decimal(value.denominator))
+    if value is math.pi:
+        return _pi(context.prec)
+    return Decimal(repr(value))
+
+
+def _decimal_div(context, a, b):
+    if not b:
+        raise CalcError("division by zero")
+    return context.divide(a, b)
+
+
+def _decimal_pow(context, a, b):
+    if not a and not b:
+        # 1 like the engine, where Decimal signals an invalid operation
+        return Decimal(1)
+    return context.power(a, b)
+
+
+def _decimal_sqrt(context, value):
+    if value < 0:
+        raise CalcError("square root of a negative number")
+    return context.sqrt(value)
+
+
+def _decimal_factorial(context, value):
+    if value == value.to_integral_value():
+        if value.adjusted() > 6:
+            raise CalcError("result too large")
+        return context.create_decimal(engine.FUNCTIONS["!"](int(value)))
+    return context.create_decimal(repr(math.gamma(float(value) + 1)))
+
+
+def _decimal_percent(context, value):
+    return context.divide(value, 100)
+
+
+def _sin_series(x):
+    # Taylor series in the current context, for |x| <= pi/2
+    x2 = x * x
+    term = total = x
+    i = 1
+    while True:
+        i += 2
+        term = -term * x2 / ((i - 1) * i)
+        new = total + term
+        if new == total:
+            return total
+        total = new
+
+
+def _sin_degrees(value, work):
+    with decimal.localcontext(work):
+        angle = value % 360
+        if angle < 0:
+            angle += 360
+        sign = 1
+        if angle >= 180:
+            angle -= 180
+            sign = -1
+        if angle > 90:
+            angle = 180 - angle
+        # exact at the angles the float engine only gets close to
+        if angle == 0:
+            result = Decimal(0)
+        elif angle == 30:
+            result = Decimal("0.5")
+        elif angle == 90:
+            result = Decimal(1)
+        else:
+            result = _sin_series(angle * _pi(work.prec) / 180)
+        return result if sign > 0 else -result
+
+
+def _decimal_sin(context, value):
+    return context.plus(_sin_degrees(value, _context(context.prec + 5)))
+
+
+def _decimal_cos(context, value):
+    work = _context(context.prec + 5)
+    return context.plus(_sin_degrees(work.add(value, 90), work))
+
+
+def _decimal_tan(context, value):
+    work = _context(context.prec + 5)
+    angle = work.remainder(value, 180)
+    if angle < 0:
+        angle = work.add(angle, 180)
+    if angle == 90:
+        raise CalcError("tan is undefined here")
+    if angle == 0:
+        return Decimal(0)
+    if angle == 45:
+        return Decimal(1)
+    if angle == 135:
+        return Decimal(-1)
+    sin = _sin_degrees(angle, work)
+    cos = _sin_degrees(work.add(angle, 90), work)
+    return context.divide(sin, cos)
+
+
+DECIMAL_OPS = {
+    "+": decimal.Context.add,
+    "-": decimal.Context.subtract,
+    "*": decimal.Context.multiply,
+    "/": _decimal_div,
+    "^": _decimal_pow,
+}
+
+DECIMAL_FUNCTIONS = {
+    "sin": _decimal_sin,
+    "cos": _decimal_cos,
+    "tan": _decimal_tan,
+    "√": _decimal_sqrt,
+    "!": _decimal_factorial,
+    "%": _decimal_percent,
+}
+
+
+def _eval_decimal(node, x, context):
+    kind = node[0]
+    if kind == NUM:
+        return _to_decimal(node[1], context)
+    if kind == "bin":
+        a = _eval_decimal(node[2], x, context)
+        b = _eval_decimal(node[3], x, context)
+        return DECIMAL_OPS[node[1]](context, a, b)
+    if kind == "call":
+        return DECIMAL_FUNCTIONS[node[1]](context, _eval_decimal(node[2], x, context))
+    if kind == "neg":
+        return context.minus(_eval_decimal(node[1], x, context))
+    if kind in engine.CALCULUS_KINDS:
+        raise CalcError("∫ and Σ are only computed in float mode")
+    if x is None:
+        raise CalcError("x has no value")
+    return _to_decimal(x, context)
+
+
+# --- fraction mode ---
+
+
+def _exact(value):
+    return isinstance(value, (int, Fraction))
+
+
+def _to_fraction(value):
+    if _exact(value):
+        return value
+    if isinstance(value, Decimal):
+        return Fraction(value)
+    if value is math.pi:
+        return value
+    return Fraction(repr(value))
+
+
+def _fraction_div(a, b):
+    if b == 0:
+        raise CalcError("division by zero")
+    if _exact(a) and _exact(b):
+        return Fraction(a) / b
+    return a / b
+
+
+def _fraction_pow(a, b):
+    if _exact(a) and _exact(b) and b.denominator == 1:
+        n = int(b)
+        if a == 0 and n < 0:
+            raise CalcError("division by zero")
+        size = max(abs(a.numerator), a.denominator)
+        if size > 1 and abs(n) * math.log10(size) > engine.MAX_INT_DIGITS:
+            raise CalcError("result too large")
+        return Fraction(a) ** n
+    return engine.BINARY_OPS["^"](float(a), float(b))
+
+
+def _fraction_sqrt(value):
+    if _exact(value) and value >= 0:
+        root_n = math.isqrt(value.numerator)
+        root_d = math.isqrt(value.denominator)
+        if root_n * root_n == value.numerator and root_d * root_d == value.denominator:
+            return Fraction(root_n, root_d)
+    return engine.FUNCTIONS["√"](float(value))
+
+
+def _fraction_factorial(value):
+    if _exact(value) and value.denominator == 1:
+        return engine.FUNCTIONS["!"](int(value))
+    return engine.FUNCTIONS["!"](float(value))
+
+
+def _fraction_percent(value):
+    if _exact(value):
+        return Fraction(value) / 100
+    return value / 100
+
+
+# sin at multiples of 30°, by (angle / 30) % 12, where it is rational
+_SIN_30 = {0: 0, 1: Fraction(1, 2), 3: 1, 5: Fraction(1, 2),
+           6: 0, 7: Fraction(-1, 2), 9: -1, 11: Fraction(-1, 2)}
+# tan at multiples of 45°, by (angle / 45) % 4
+_TAN_45 = {0: 0, 1: 1, 3: -1}
+
+
+def _fraction_sin(value):
+    if _exact(value) and value % 30 == 0:
+        step = int(value // 30) % 12
+        if step in _SIN_30:
+            return _SIN_30[step]
+    return engine.FUNCTIONS["sin"](float(value))
+
+
+def _fraction_cos(value):
+    if _exact(value):
+        return _fraction_sin(value + 90)
+    return engine.FUNCTIONS["cos"](float(value))
+
+
+def _fraction_tan(value):
+    if _exact(value) and value % 45 == 0:
+        step = int(value // 45) % 4
+        if step == 2:
+            raise CalcError("tan is undefined here")
+        return _TAN_45[step]
+    return engine.FUNCTIONS["tan"](float(value))
+
+
+FRACTION_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": _fraction_div,
+    "^": _fraction_pow,
+}
+
+FRACTION_FUNCTIONS = {
+    "sin": _fraction_sin,
+    "cos": _fraction_cos,
+    "tan": _fraction_tan,
+    "√": _fraction_sqrt,
+    "!": _fraction_factorial,
+    "%": _fraction_percent,
+}
+
+
+def _eval_fraction(node, x):
+    kind = node[0]
+    if kind == NUM:
+        return _to_fraction(node[1])
+    if kind == "bin":
+        a = _eval_fraction(node[2], x)
+        b = _eval_fraction(node[3], x)
+        return FRACTION_OPS[node[1]](a, b)
+    if kind == "call":
+        return FRACTION_FUNCTIONS[node[1]](_eval_fraction(node[2], x))
+    if kind == "neg":
+        return -_eval_fraction(node[1], x)
+    if kind in engine.CALCULUS_KINDS:
+        raise CalcError("∫ and Σ are only computed in float mode")
+    if x is None:
+        raise CalcError("x has no value")
+    return _to_fraction(x)
+
+
+# --- public API ---
+
+
+def _evaluate(node, mode, precision, x):
+    if mode == "decimal":
+        work = _context(precision + GUARD_DIGITS)
+        return _context(precision).plus(_eval_decimal(node, x, work))
+    result = _eval_fraction(node, x)
+    if isinstance(result, Fraction) and result.denominator == 1:
+        return result.numerator
+    if isinstance(result, float) and not math.isfinite(result):
+        raise CalcError("result is not finite")
+    return result
+
+
+def evaluate(node, mode="decimal", precision=DEFAULT_PRECISION, x=None):
+    # node must come from parse(text, mode) to keep every digit of the literals
+    if mode == "float":
+        return engine.evaluate(node, x)
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    try:
+        return _evaluate(node, mode, precision, x)
+    except CalcError:
+        raise
+    except (ArithmeticError, ValueError, TypeError, RecursionError) as e:
+        raise CalcError(str(e)) from e
+
+
+def evaluate_text(text, mode="decimal", precision=DEFAULT_PRECISION, x=None):
+    if mode == "float":
+        return shared_cache.evaluate(text, x)
+    if x is None and mode in MODES:
+        result = _fast_path(text, mode, _context(precision))
+        if result is not None:
+            return result
+    return evaluate(parse(text, mode), mode, precision, x)
+
+
+def format_value(value, precision=DEFAULT_PRECISION):
+    if isinstance(value, Decimal):
+        if value.is_zero():
+            return "0"
+        value = value.normalize(_context(precision))
+        if -7 <= value.adjusted() < precision:
+            return format(value, "f")
+        return format(value, "e")
+    if isinstance(value, Fraction):
+        return f"{format_number(value.numerator)}/{format_number(value.denominator)}"
+    return format_number(value)
+
+
+def calculate(text, mode="decimal", precision=DEFAULT_PRECISION, x=None):
+    try:
+        return format_value(evaluate_text(text, mode, precision, x), precision)
+    except (CalcError, ValueError):
+        return "Error"
@@ -0,0 +1,131 @@
+"""Value of a possibly unfinished expression, for the live preview.
+
+An expression is a sequence of terms joined by the "+" and "-" that are
+binary operators outside parentheses. A term's value depends only on its
+own text, so ``Preview`` keeps the value of every term of the last text it
+saw, together with the running total up to that term. When the text
+changes, only the terms from the first one that differs are scanned,
+parsed and evaluated again; while typing, that is the last one. The totals are
+accumulated left to right like the parser's left-associative + and -, so
+the value is the same as that of the whole text.
+
+An unfinished tail is completed before it is parsed: trailing operators,
+functions and "(" are dropped, and the parser closes open parentheses.
+Nothing goes through the shared expression cache, which would fill up
+with every prefix of what is typed. Terms with ∫ or Σ have no preview:
+they may take seconds, which only "=" spends, in a worker.
+"""
+
+from . import engine, precision
+from .worker import uses_calculus
+
+_VALUE_END = frozenset("0123456789.)πx!%")
+_SIGNS = {"+": "+", "-": "-", "−": "-"}
+_DANGLING = ("+", "-", "−", "*", "×", "/", "÷", "^", "(", ",", "√", "sin", "cos", "tan", "∫", "Σ")
+# the value of an empty term, which leaves the total as it is
+_NOTHING = object()
+
+
+def split_terms(text, start=0):
+    # the start of every term of text from start on, which must itself be
+    # the start of a term: outside parentheses and after a sign
+    starts = [start]
+    depth = 0
+    previous = ""
+    for i in range(start, len(text)):
+        ch = text[i]
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch in _SIGNS and depth == 0 and previous in _VALUE_END:
+            # after a value: binary, not a sign; "e" of an exponent is not
+            # a value end, so 1e-5 stays whole
+            starts.append(i + 1)
+        if not ch.isspace():
+            previous = ch
+    return starts
+
+
+def complete(text):
+    text = text.rstrip()
+    while True:
+        for tail in _DANGLING:
+            if text.endswith(tail):
+                text = text[: -len(tail)].rstrip()
+                break
+        else:
+            return text
+
+
+def term_value(text):
+    # None when the term has no value
+    text = complete(text)
+    if not text:
+        return _NOTHING
+    try:
+        node = engine.parse(text)
+        if uses_calculus(node):
+            return None
+        return engine.evaluate(node)
+    except engine.CalcError:
+        return None
+
+
+class Preview:
+    __slots__ = ("_last",)
+
+    def __init__(self):
+        # the last text, where each of its terms starts and the total up
+        # to each of them
+        self._last = ("", [0], [])
+
+    def value(self, text):
+        # float mode; None when the text has no value (yet)
+        last_text, last_starts, last_totals = self._last
+        # terms before a start whose prefix is unchanged are kept, and the
+        # text is only scanned from there; while typing, that is the last
+        keep = len(last_starts) - 1
+        while keep > 0 and not text.startswith(last_text[: last_starts[keep]]):
+            keep -= 1
+        starts = last_starts[:keep] + split_terms(text, last_starts[keep])
+        totals = last_totals[:keep]
+        total = totals[-1] if totals else _NOTHING
+        for i in range(keep, len(starts)):
+            end = starts[i + 1] - 1 if i + 1 < len(starts) else len(text)
+            value = term_value(text[starts[i] : end])
+            if total is None or value is None:
+                total = None
+            elif value is _NOTHING:
+                pass
+            elif total is _NOTHING:
+                total = value
+            else:
+                sign = _SIGNS[text[starts[i] - 1]]
+                try:
+                    total = engine.evaluate(("bin", sign, ("num", total), ("num", value)))
+                except engine.CalcError:
+                    total = None
+            totals.append(total)
+        self._last = (text, starts, totals)
+        return None if total is _NOTHING else total
+
+    def display(self, text, mode="float", digits=precision.DEFAULT_PRECISION):
+        if mode != "float":
+            # rounding depends on the whole expression; this is the slow
+            # path anyway, the preview's debounce bounds how often it runs
+            text = complete(text)
+            if not text:
+                return None
+            try:
+                value = precision.evaluate(precision.parse(text, mode), mode, digits)
+                return precision.format_value(value, digits)
+            except (engine.CalcError, ValueError):
+                return None
+        value = self.value(text)
+        if value is None:
+            return None
+        try:
+            return engine.format_number(value)
+        except ValueError:
+            return None
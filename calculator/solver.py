@@ -0,0 +1,147 @@
+"""Solving an equation in x for its real roots on an interval.
+
+``solve("x^3-2*x=5")`` parses the equation once, into the AST of
+``left - right`` (an expression alone is solved for 0), and looks for the
+roots in ``[lo, hi]`` in two steps:
+
+* the expression is evaluated on a grid of ``GRID_POINTS`` x values at
+  once (see ``vector``); neighbouring points where it changes sign bracket
+  a root, and a point where ``|f|`` is smallest among its neighbours
+  without a sign change may be a root that only touches 0, like ``x^2``'s;
+* each bracket is narrowed by Newton steps, with the derivative from
+  ``compiler.compile_derivative``, and by bisection wherever a step would
+  leave the bracket or there is no derivative.
+
+A sign change that grows towards its middle instead of shrinking is a pole
+(``1/x``, ``tan``), not a root. Roots closer together than the grid's
+spacing, other than touching ones, may be missed. An equation that holds at
+every grid point, such as ``x=x``, is an error rather than 4001 roots.
+"""
+
+import math
+
+import numpy as np
+
+from . import compiler, engine, vector
+
+DEFAULT_INTERVAL = (-100.0, 100.0)
+GRID_POINTS = 4001
+MAX_ITERATIONS = 100
+# relative to the size of the root
+X_TOLERANCE = 1e-13
+# what |f| of a touching root may be, relative to |f| at the grid points
+# on either side of it
+TOUCH_TOLERANCE = 1e-12
+
+
+def parse_equation(text):
+    left, equals, right = text.partition("=")
+    if "=" in right:
+        raise engine.CalcError("more than one =")
+    node = engine.parse(left)
+    if equals:
+        node = ("bin", "-", node, engine.parse(right))
+    if not engine.has_variable(node):
+        raise engine.CalcError("no x to solve for")
+    return node
+
+
+def _value(dual, x):
+    try:
+        return dual(x)
+    except engine.CalcError:
+        return None, None
+
+
+def refine(dual, a, b, fa, fb):
+    # a root in [a, b], where f changes sign; None if it is a pole or f
+    # cannot be evaluated in between
+    bound = max(abs(fa), abs(fb))
+    # the secant's crossing is a better first guess than the middle
+    x = a - fa * (b - a) / (fb - fa)
+    for _ in range(MAX_ITERATIONS):
+        fx, dfx = _value(dual, x)
+        if fx is None:
+            return None
+        if fx == 0:
+            return x
+        if (fx < 0) == (fa < 0):
+            a, fa = x, fx
+        else:
+            b, fb = x, fx
+        tolerance = X_TOLERANCE * max(1.0, abs(x))
+        if b - a <= tolerance:
+            break
+        step = fx / dfx if dfx and math.isfinite(dfx) else math.inf
+        if a < x - step < b:
+            x -= step
+            if abs(step) <= tolerance:
+                break
+        else:
+            x = (a + b) / 2
+    fx, _ = _value(dual, x)
+    if fx is None or abs(fx) > bound:
+        return None
+    return x
+
+
+def polish(dual, x, a, b, scale):
+    # a root near x that f touches without crossing, or None
+    for _ in range(MAX_ITERATIONS):
+        fx, dfx = _value(dual, x)
+        if fx is None:
+            return None
+        if abs(fx) <= TOUCH_TOLERANCE * scale:
+            return x
+        if not dfx or not math.isfinite(dfx):
+            return None
+        x -= fx / dfx
+        if not a <= x <= b:
+            return None
+    return None
+
+
+def solve(equation, lo=None, hi=None, points=GRID_POINTS):
+    # equation is text or the AST of an expression that is 0 at the roots;
+    # returns the roots found in [lo, hi], in order
+    if lo is None:
+        lo = DEFAULT_INTERVAL[0]
+    if hi is None:
+        hi = DEFAULT_INTERVAL[1]
+    if not lo < hi:
+        raise engine.CalcError("the interval is empty")
+    node = parse_equation(equation) if isinstance(equation, str) else equation
+    dual = compiler.compile_derivative(node)
+    xs = np.linspace(lo, hi, points)
+    ys = vector.evaluate_many(node, xs)
+    defined = np.isfinite(ys)
+    if defined.any() and not ys[defined].any():
+        # 0 wherever it is defined: not roots but an identity
+        raise engine.CalcError("true for every x")
+
+    roots = [float(x) for x in xs[ys == 0]]
+    signs = np.sign(ys)
+    for i in np.flatnonzero(signs[:-1] * signs[1:] < 0):
+        root = refine(dual, float(xs[i]), float(xs[i + 1]), float(ys[i]), float(ys[i + 1]))
+        if root is not None:
+            roots.append(root)
+
+    # |f| at its smallest between two neighbours of the same sign
+    size = np.abs(ys)
+    inner = size[1:-1]
+    touching = np.flatnonzero(
+        (inner <= size[:-2]) & (inner < size[2:]) & (signs[:-2] * signs[2:] > 0) & (inner > 0)
+    ) + 1
+    for i in touching:
+        scale = float(max(size[i - 1], size[i + 1]))
+        root = polish(dual, float(xs[i]), float(xs[i - 1]), float(xs[i + 1]), scale)
+        if root is not None:
+            roots.append(root)
+
+    roots.sort()
+    distinct = []
+    for root in roots:
+        if distinct and root - distinct[-1] <= 1e-9 * max(1.0, abs(root)):
+            continue
+        distinct.append(root)
+    return distinct
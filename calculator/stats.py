@@ -0,0 +1,200 @@
+"""Statistics of a stream of numbers in constant memory.
+
+``RunningStats`` keeps the count, mean, variance, minimum and maximum of
+the values added so far, and a t-digest for their quantiles, never the
+values themselves:
+
+* the mean and variance are Welford's running sums. A single value
+  updates them as Welford does; a chunk of values is summarized with NumPy
+  and merged in with Chan's form of the same update;
+* the t-digest (Dunning's merging digest) summarizes the values as at most
+  about ``COMPRESSION / 2`` clusters, each a mean and a weight, kept in
+  order. Clusters are small in the tails and large in the middle, so the
+  error of a quantile is smallest near 0 and 1. Values are buffered and
+  merged ``BUFFER_SIZE`` at a time, or a chunk at once: sorted together
+  with the clusters and regrouped so that no cluster spans more than one
+  step of the scale function ``k(q) = δ/2π · asin(2q - 1)``.
+
+``chunks`` reads the numbers of pasted text, or of one column of CSV
+lines, as NumPy arrays of about ``CHUNK`` values for ``add_many``, so a
+pasted column of a million values is never a list of a million floats.
+"""
+
+import csv
+import io
+import itertools
+import math
+import re
+
+import numpy as np
+
+from . import engine
+
+COMPRESSION = 1000
+BUFFER_SIZE = 1000
+CHUNK = 1 << 16
+# characters of pasted text per number, to cut it into chunks
+TEXT_PER_NUMBER = 8
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_NUMBER_CHARACTERS = frozenset("0123456789.eE+-")
+
+
+class TDigest:
+    __slots__ = ("compression", "means", "weights", "buffer", "minimum", "maximum")
+
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.flush()
+
+    def add_many(self, values):
+        if self.buffer:
+            values = np.concatenate((values, self.buffer))
+            self.buffer = []
+        if len(values):
+            self.merge(values)
+
+    def flush(self):
+        values, self.buffer = np.array(self.buffer, dtype=float), []
+        if len(values):
+            self.merge(values)
+
+    def merge(self, values):
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, np.ones(len(values))))
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+        # the quantile at the start of every cluster, then its k; clusters
+        # whose start falls in the same step of k are merged
+        before = np.cumsum(weights) - weights
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * before / weights.sum() - 1)
+        steps = np.floor(k - k[0]).astype(np.intp)
+        starts = np.flatnonzero(np.diff(steps, prepend=-1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        self.flush()
+        if not len(self.means):
+            raise engine.CalcError("no values")
+        # every cluster's mean stands for the middle of its weight; between
+        # the middles and out to the minimum and maximum, interpolate
+        total = self.weights.sum()
+        middles = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate(([0.0], middles, [total]))
+        ys = np.concatenate(([self.minimum], self.means, [self.maximum]))
+        return float(np.interp(q * total, xs, ys))
+
+
+class RunningStats:
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum", "digest")
+
+    def __init__(self, compression=COMPRESSION):
+        self.count = 0
+        self.mean = 0.0
+        # the sum of squared differences from the mean
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.digest = TDigest(compression)
+
+    def add(self, value):
+        value = float(value)
+        if not math.isfinite(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.digest.add(value)
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if not n:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.digest.add_many(values)
+
+    @property
+    def variance(self):
+        # of a sample
+        if self.count < 2:
+            raise engine.CalcError("the variance needs two values")
+        return self.m2 / (self.count - 1)
+
+    @property
+    def deviation(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        return self.digest.quantile(q)
+
+
+def _boundary(text, end):
+    # end moved past the number it would cut in two
+    while end < len(text) and text[end] in _NUMBER_CHARACTERS:
+        end += 1
+    return end
+
+
+def _column(text, column):
+    rows = csv.reader(io.StringIO(text))
+    if column.isdigit():
+        index = int(column) - 1
+    else:
+        header = [name.strip() for name in next(rows, [])]
+        if column not in header:
+            raise engine.CalcError(f"no column {column}")
+        index = header.index(column)
+    for row in rows:
+        if index < len(row):
+            try:
+                yield float(row[index])
+            except ValueError:
+                # a header, an empty cell
+                pass
+
+
+def chunks(text, column=None):
+    # the numbers in text as arrays of about CHUNK, in order; or those of
+    # one column of CSV lines, by its number from 1 or its name in the first
+    # line
+    if column is not None:
+        numbers = _column(text, column)
+        while True:
+            chunk = np.fromiter(itertools.islice(numbers, CHUNK), dtype=float)
+            if not len(chunk):
+                return
+            yield chunk
+    start = 0
+    while start < len(text):
+        end = _boundary(text, start + CHUNK * TEXT_PER_NUMBER)
+        found = _NUMBER_RE.findall(text, start, end)
+        start = end
+        if found:
+            yield np.array(found, dtype=float)
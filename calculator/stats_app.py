@@ -0,0 +1,186 @@
+"""The statistics calculator.
+
+Values typed in the entry, or a list of numbers or a CSV column pasted
+below it, are added to running statistics (see ``stats``): count, mean,
+standard deviation, variance, minimum, maximum and quantiles. The running
+statistics are all a session keeps of the values. A long paste is read a
+chunk at a time and the figures are updated as it goes. Start it with
+``python -m calculator --app stats``.
+"""
+
+import re
+import time
+
+import flet as ft
+
+from . import engine, stats
+
+# the figures are updated at most once per this many seconds while a paste
+# is read
+UPDATE_INTERVAL = 0.1
+QUANTILES = {f"{q:.0%}": q for q in stats.QUANTILES}
+FIGURES = ("count", "mean", "std dev", "variance", "min", "max", *QUANTILES)
+
+_SEPARATORS_RE = re.compile(r"[\s,;]+")
+
+
+class ActionButton(ft.ElevatedButton):
+    def __init__(self, text, on_click):
+        super().__init__(text=text, on_click=on_click)
+        self.bgcolor = ft.colors.ORANGE
+        self.color = ft.colors.WHITE
+
+
+class ExtraActionButton(ft.ElevatedButton):
+    def __init__(self, text, on_click):
+        super().__init__(text=text, on_click=on_click)
+        self.bgcolor = ft.colors.BLUE_GREY_100
+        self.color = ft.colors.BLACK
+
+
+def display(value):
+    if isinstance(value, int):
+        return str(value)
+    # the last digits of a float are mostly rounding
+    return engine.format_number(float(f"{value:.12g}"))
+
+
+class StatsApp(ft.Container):
+    def __init__(self):
+        super().__init__()
+        self.running = stats.RunningStats()
+        self.entry = ft.TextField(
+            label="value", dense=True, color=ft.colors.WHITE, expand=True, on_submit=self.enter
+        )
+        self.pasted = ft.TextField(
+            label="numbers or CSV",
+            multiline=True,
+            min_lines=3,
+            max_lines=8,
+            dense=True,
+            color=ft.colors.WHITE,
+        )
+        self.column = ft.TextField(label="column", hint_text="all", dense=True, width=100)
+        self.status = ft.Text(color=ft.colors.WHITE54, size=12)
+        self.progress = ft.ProgressRing(width=16, height=16, stroke_width=2, visible=False)
+        self.figures = {
+            name: ft.Text(color=ft.colors.WHITE, size=16, selectable=True) for name in FIGURES
+        }
+        self.busy = False
+
+        self.width = 350
+        self.bgcolor = ft.colors.BLACK
+        self.border_radius = ft.border_radius.all(20)
+        self.padding = 20
+        self.content = ft.Column(
+            controls=[
+                *(
+                    ft.Row(
+                        controls=[ft.Text(name, color=ft.colors.WHITE54, size=14), text],
+                        alignment="spaceBetween",
+                    )
+                    for name, text in self.figures.items()
+                ),
+                ft.Row(controls=[self.progress, self.status]),
+                ft.Row(
+                    controls=[
+                        self.entry,
+                        ActionButton(text="add", on_click=self.enter),
+                    ]
+                ),
+                self.pasted,
+                ft.Row(
+                    controls=[
+                        self.column,
+                        ActionButton(text="add all", on_click=self.add_pasted),
+                        ExtraActionButton(text="AC", on_click=self.clear),
+                    ]
+                ),
+            ]
+        )
+        self.show()
+
+    def show(self):
+        running = self.running
+        values = {"count": running.count}
+        if running.count:
+            values["mean"] = running.mean
+            values["min"] = running.minimum
+            values["max"] = running.maximum
+            for name, q in QUANTILES.items():
+                values[name] = running.quantile(q)
+        if running.count > 1:
+            values["variance"] = running.variance
+            values["std dev"] = running.deviation
+        for name, text in self.figures.items():
+            text.value = display(values[name]) if name in values else "–"
+
+    def enter(self, e):
+        # every number of the entry, or none of them if one is not a number
+        if self.busy:
+            return
+        text = (self.entry.value or "").strip()
+        try:
+            numbers = [engine.number(token) for token in _SEPARATORS_RE.split(text) if token]
+        except engine.CalcError as error:
+            self.status.value = f"Error: {error}"
+            self.status.update()
+            return
+        for number in numbers:
+            self.running.add(number)
+        self.entry.value = ""
+        self.status.value = ""
+        self.show()
+        self.page.update(self.entry, self.status, *self.figures.values())
+        self.entry.focus()
+
+    def add_pasted(self, e):
+        if self.busy:
+            return
+        self.busy = True
+        self.progress.visible = True
+        self.progress.update()
+        running = self.running
+        column = (self.column.value or "").strip() or None
+        count = running.count
+        # numbers too large for a float, such as 1e999, are left out
+        read = 0
+        shown = time.perf_counter()
+        try:
+            for chunk in stats.chunks(self.pasted.value or "", column):
+                if running is not self.running:
+                    # AC while it was read
+                    break
+                running.add_many(chunk)
+                read += len(chunk)
+                if time.perf_counter() - shown >= UPDATE_INTERVAL:
+                    self.status.value = f"{running.count - count} values added"
+                    self.show()
+                    self.page.update(self.status, *self.figures.values())
+                    shown = time.perf_counter()
+            else:
+                # the statistics are all that is kept
+                self.pasted.value = ""
+                added = running.count - count
+                self.status.value = f"{added} values added"
+                if read > added:
+                    self.status.value += f", {read - added} not finite left out"
+        except engine.CalcError as error:
+            self.status.value = f"Error: {error}"
+        finally:
+            self.busy = False
+            self.progress.visible = False
+        self.show()
+        self.page.update(self.pasted, self.progress, self.status, *self.figures.values())
+
+    def clear(self, e):
+        self.running = stats.RunningStats()
+        self.status.value = ""
+        self.show()
+        self.page.update(self.status, *self.figures.values())
+
+
+def main(page: ft.Page):
+    page.title = "Calc App"
+    page.scroll = ft.ScrollMode.AUTO
+    page.add(StatsApp())
@@ -0,0 +1,270 @@
+"""Bounded-time evaluation in worker processes.
+
+``!`` and ``^`` on whole numbers build exact integers whose cost grows with
+the size of the result, and a single C call such as ``math.factorial``
+cannot be interrupted from another thread. An expression where one of them
+may give more than ``INLINE_DIGITS`` digits, as estimated from the
+logarithms of the numbers it is made of, is therefore sent to a small
+pool of worker processes; ``2^10`` and ``3!`` are evaluated in place. So
+are ∫ and Σ, which ask for a lot of work on purpose. The caller polls
+its worker while it waits, so a time budget or a cancel event (AC) kills
+that worker and starts a fresh one without touching other sessions.
+
+Inside a worker the engine may build results of up to ``max_digits``
+digits instead of the interactive limit, since the time budget now bounds
+the cost. Results come back as display text (see ``display``); ``expand``
+asks a worker for all the digits of a result when the user wants them.
+``evaluate`` takes a ``mode`` as well, for the ASTs of ``precision``'s
+decimal and fraction modes, which build the same large integers.
+"""
+
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+from . import engine, factorial
+
+DEFAULT_TIMEOUT = 2.0
+# ∫ and Σ ask for a lot of work on purpose; AC still stops them
+CALCULUS_TIMEOUT = 10.0
+DEFAULT_MAX_DIGITS = 100_000
+# ! and ^ with results up to this many digits are evaluated in place
+INLINE_DIGITS = 1000
+_POLL_INTERVAL = 0.02
+
+
+class EvaluationTimeout(engine.CalcError):
+    pass
+
+
+class EvaluationCancelled(engine.CalcError):
+    pass
+
+
+def _log10_size(node):
+    # at least log10 of the value's magnitude, 0 below 1; None if it cannot
+    # be told without evaluating, e.g. with x
+    kind = node[0]
+    if kind == engine.NUM:
+        return math.log10(max(abs(node[1]), 1))
+    if kind == "neg":
+        return _log10_size(node[1])
+    if kind == "bin":
+        a = _log10_size(node[2])
+        if node[1] == "/":
+            # an int only gets larger when the divisor is below 1
+            divisor = node[3]
+            return a if divisor[0] == engine.NUM and abs(divisor[1]) >= 1 else None
+        b = _log10_size(node[3])
+        if a is None or b is None:
+            return None
+        if node[1] == "*":
+            return a + b
+        if node[1] == "^":
+            # |a|^b with b at most 10^b
+            return a * 10**b if b < 300 else None
+        return max(a, b) + math.log10(2)
+    if kind == "call":
+        a = _log10_size(node[2])
+        if a is None or node[1] == "tan":
+            return None
+        if node[1] in ("sin", "cos"):
+            return 0
+        if node[1] == "√":
+            return a / 2
+        if node[1] == "!":
+            return factorial.log10_factorial(math.ceil(10**a)) if a < 15 else None
+        return a
+    return None
+
+
+def needs_worker(node):
+    kind = node[0]
+    if kind == "bin":
+        if needs_worker(node[2]) or needs_worker(node[3]):
+            return True
+    elif kind == "call":
+        if needs_worker(node[2]):
+            return True
+    elif kind == "neg":
+        return needs_worker(node[1])
+    else:
+        # many rounds of quadrature or millions of terms
+        return kind in engine.CALCULUS_KINDS
+    if node[1] not in ("^", "!"):
+        return False
+    size = _log10_size(node)
+    return size is None or size > INLINE_DIGITS
+
+
+def uses_calculus(node):
+    kind = node[0]
+    if kind in engine.CALCULUS_KINDS:
+        return True
+    if kind == "bin":
+        return uses_calculus(node[2]) or uses_calculus(node[3])
+    if kind in ("call", "neg"):
+        return uses_calculus(node[-1])
+    return False
+
+
+def _full_digits(node, x):
+    if node[0] == "call" and node[1] == "!" and node[2][0] == engine.NUM:
+        n = node[2][1]
+        if isinstance(n, int) and n >= 0:
+            if factorial.log10_factorial(n) > engine.MAX_INT_DIGITS:
+                raise engine.CalcError("result too large")
+            # linear-time digits instead of str() on the int
+            return factorial.factorial_digits(n)
+    value = engine.evaluate(node, x)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _worker_main(conn, max_digits):
+    # forked with the server's signal handlers, which would keep the
+    # SIGTERM that ends a worker at exit from ending it; SIGINT from a
+    # terminal is the server's to handle
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    engine.MAX_INT_DIGITS = max_digits
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(max(max_digits + 1, 4300))
+    while True:
+        try:
+            node, x, full, mode, digits = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            if mode != "float":
+                from . import precision
+
+                value = precision.evaluate(node, mode, digits, x)
+                reply = (True, precision.format_value(value, digits))
+            elif full:
+                reply = (True, _full_digits(node, x))
+            else:
+                reply = (True, engine.format_number(engine.evaluate(node, x)))
+        except (engine.CalcError, ValueError) as e:
+            reply = (False, str(e))
+        conn.send(reply)
+
+
+# fork, because spawn and forkserver would re-run the app's __main__
+# module in every worker
+_CONTEXT = multiprocessing.get_context(
+    "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+)
+
+
+class _Worker:
+    def __init__(self, max_digits):
+        self.conn, child_conn = _CONTEXT.Pipe()
+        self.process = _CONTEXT.Process(
+            target=_worker_main, args=(child_conn, max_digits), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        processes=None,
+        timeout=DEFAULT_TIMEOUT,
+        max_digits=DEFAULT_MAX_DIGITS,
+        calculus_timeout=CALCULUS_TIMEOUT,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.timeout = timeout
+        self.calculus_timeout = calculus_timeout
+        self.max_digits = max_digits
+        self.killed = 0
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self, deadline, cancel):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._started < self.processes:
+                    self._started += 1
+                    break
+            self._check(deadline, cancel)
+            try:
+                return self._idle.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        try:
+            return _Worker(self.max_digits)
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _check(self, deadline, cancel):
+        if cancel is not None and cancel.is_set():
+            raise EvaluationCancelled("cancelled")
+        if time.monotonic() > deadline:
+            raise EvaluationTimeout("took too long")
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._started -= 1
+            self.killed += 1
+
+    def evaluate(self, node, x=None, cancel=None, timeout=None, mode="float", digits=None):
+        # returns the display string; raises CalcError, EvaluationTimeout
+        # or EvaluationCancelled. node comes from precision.parse(text,
+        # mode), digits is the precision of the decimal mode
+        return self._run(node, x, False, cancel, timeout, mode, digits)
+
+    def expand(self, node, x=None, cancel=None, timeout=None):
+        # all digits of the result, for when the user asks to see them
+        return self._run(node, x, True, cancel, timeout)
+
+    def _run(self, node, x, full, cancel, timeout, mode="float", digits=None):
+        if timeout is None:
+            timeout = self.calculus_timeout if uses_calculus(node) else self.timeout
+        deadline = time.monotonic() + timeout
+        worker = self._acquire(deadline, cancel)
+        try:
+            worker.conn.send((node, x, full, mode, digits))
+            while not worker.conn.poll(_POLL_INTERVAL):
+                self._check(deadline, cancel)
+            ok, value = worker.conn.recv()
+        except BaseException:
+            self._discard(worker)
+            raise
+        self._idle.put(worker)
+        if not ok:
+            raise engine.CalcError(value)
+        return value
+
+    def shutdown(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(worker)
+
+
+shared_pool = WorkerPool()